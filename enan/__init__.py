@@ -1,18 +1,18 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Wed Dec 25 15:46:32 2019
-
-@author: tadahaya
-"""
-
-from .binom import BT
-from .connect import Connect
-from .fet import FET
-from .gsea import GSEA
-from .ssgsea import ssGSEA
-
-__copyright__    = 'Copyright (C) 2021 MIZUNO Tadahaya'
-__version__      = '1.0.4'
-__license__      = 'MIT'
-__author__       = 'MIZUNO Tadahaya'
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Dec 25 15:46:32 2019
+
+@author: tadahaya
+"""
+
+from .binom import BT
+from .connect import Connect
+from .fet import FET
+from .gsea import GSEA
+from .ssgsea import ssGSEA
+
+__copyright__    = 'Copyright (C) 2021 MIZUNO Tadahaya'
+__version__      = '1.0.4'
+__license__      = 'MIT'
+__author__       = 'MIZUNO Tadahaya'
 __author_email__ = 'tadahaya@gmail.com'
\ No newline at end of file
@@ -1,94 +1,201 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Mon Sep 23 12:59:35 2019
-
-Binomial test
-
-@author: tadahaya
-"""
-import pandas as pd
-import numpy as np
-import scipy.stats as stats
-import statsmodels.stats.multitest as multitest
-from scipy.stats import rankdata
-
-
-class Calculator():
-    def __init__(self):
-        self.res = pd.DataFrame()
-
-
-    def calc(self,obj,ref,whole,focus=None,**kwargs):
-        self.res = do_binom(obj,ref,whole,focus=None,**kwargs)
-        return self.res
-
-
-    def get_details(self):
-        return self.res
-
-
-def do_binom(obj,ref,whole,focus=None,correction="fdr_bh",mode="greater"):
-    """
-    conduct Binomial test and obtain p value corrected for multiple tests
-    all elements should be given as ID, except for term
-    
-    Parameters
-    ----------
-    obj: set
-        a set of variables in signature of interest
-        
-    ref: dict
-        a dict of term and member list of datasets
-
-    whole: set
-        a set of whole variables adjusted between datasets and interest 
-        
-    method: str
-        indicate method for correcting multiple tests
-        depend on "statsmodels.stats.multitest.multipletests"
-        
-    focus: int
-        export results by XX th lowest p value
-
-    mode: str
-        indicate the type of significant judging
-        "greater", "two-sided", or "less"
-
-    """
-    pval = []
-    overlap = []
-    total = []
-    hit = []
-    ap = pval.append
-    ap2 = overlap.append
-    ap3 = total.append
-    ap4 = hit.append
-    n_whole = len(whole)
-    keys = list(ref.keys())
-    values = list(ref.values())
-    for m in values:
-        n_set = len(m)
-        pc = n_set/n_whole
-        inter = obj & m
-        n_inter = len(inter)
-        ap(stats.binom_test(n_inter,n_set,pc,alternative=mode))
-        ap2(inter)
-        ap3(len(m))
-        ap4(n_inter)
-    if len(pval)==0:
-        res = pd.DataFrame(columns=["p value","adjusted p value","overlap","hit No.",
-                                    "total No."])
-    else:
-        res = pd.DataFrame({"p value":pval,"overlap":overlap,
-                            "hit No.":hit,"total No.":total},index=keys).sort_values(by="p value")
-        fxn = lambda x: len(x) > 0
-        res = res[res["overlap"].map(fxn)]
-        if res.shape[0]!=0:
-            res["adjusted p value"] = multitest.multipletests(res["p value"],alpha=0.05,method=correction)[1]
-            res = res.sort_values(by="p value")
-            res = res.loc[:,["p value","adjusted p value","overlap","hit No.","total No."]] # sort
-    if (focus is None) or (res.shape[0]==0):
-        pass
-    else:
-        res = res.iloc[:focus,:]
-    return res
\ No newline at end of file
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Sep 23 12:59:35 2019
+
+Binomial test
+
+@author: tadahaya
+"""
+import pandas as pd
+import numpy as np
+import scipy.stats as stats
+import statsmodels.stats.multitest as multitest
+from scipy.stats import rankdata
+
+from ._ref import RefMatrix,_batch_input,_batch_table,_touched
+
+
+class Calculator():
+    def __init__(self):
+        self.res = pd.DataFrame()
+
+
+    def calc(self,obj,ref,whole,focus=None,**kwargs):
+        self.res = do_binom(obj,ref,whole,focus=None,**kwargs)
+        return self.res
+
+
+    def calc_batch(self,obj,ref,whole,**kwargs):
+        self.res = do_binom_batch(obj,ref,whole,**kwargs)
+        return self.res
+
+
+    def get_details(self):
+        return self.res
+
+
+def do_binom(obj,ref,whole,focus=None,correction="fdr_bh",mode="greater"):
+    """
+    conduct Binomial test and obtain p value corrected for multiple tests
+    all elements should be given as ID, except for term
+    
+    Parameters
+    ----------
+    obj: set
+        a set of variables in signature of interest
+        
+    ref: dict or RefMatrix
+        a dict of term and member list of datasets
+        or the compiled one, whose inverted index is reused between calls
+
+    whole: set
+        a set of whole variables adjusted between datasets and interest 
+        
+    method: str
+        indicate method for correcting multiple tests
+        depend on "statsmodels.stats.multitest.multipletests"
+        
+    focus: int
+        export results by XX th lowest p value
+
+    mode: str
+        indicate the type of significant judging
+        "greater", "two-sided", or "less"
+
+    """
+    n_whole = len(whole)
+    if not isinstance(ref,RefMatrix):
+        ref = RefMatrix(ref)
+    # only the sets sharing members with obj are tested, the others are omitted anyway
+    keys,overlap,hit,total = _touched(obj,ref)
+    pval = _binom_test(hit,total,total/n_whole,alternative=mode)
+    if len(ref.keys)==0:
+        res = pd.DataFrame(columns=["p value","adjusted p value","overlap","hit No.",
+                                    "total No."])
+    else:
+        res = pd.DataFrame({"p value":pval,"overlap":overlap,
+                            "hit No.":hit,"total No.":total},index=keys).sort_values(by="p value")
+        if res.shape[0]!=0:
+            res["adjusted p value"] = multitest.multipletests(res["p value"],alpha=0.05,method=correction)[1]
+            res = res.sort_values(by="p value")
+            res = res.loc[:,["p value","adjusted p value","overlap","hit No.","total No."]] # sort
+    if (focus is None) or (res.shape[0]==0):
+        pass
+    else:
+        res = res.iloc[:focus,:]
+    return res
+
+
+def do_binom_batch(obj,ref,whole,correction="fdr_bh",focus=None,mode="greater"):
+    """
+    conduct Binomial test of many query sets against the reference at once
+    the overlap counts of all the pairs are obtained by one sparse matrix product
+    and the pairs without overlap are omitted as in do_binom
+
+    Parameters
+    ----------
+    obj: dict or list
+        query sets like {"query1":{"aa","bb"},...}, named 0,1,2,... if a list
+
+    ref: dict or RefMatrix
+        a dict of term and member list of datasets
+
+    whole: set
+        a set of whole variables adjusted between datasets and interest
+
+    correction: str
+        indicate method for correcting multiple tests, applied for each query
+        depend on "statsmodels.stats.multitest.multipletests"
+
+    focus: int
+        export results by XX th lowest p value of each query
+
+    mode: str
+        indicate the type of significant judging
+        "greater", "two-sided", or "less"
+
+    Returns res
+    ----------
+    res: dataframe
+        long-format table of query x term with
+        ["query","term","p value","adjusted p value","hit No.","total No."],
+        sorted by p value in each query
+
+    """
+    names,queries,ref = _batch_input(obj,ref)
+    query,tag,hit = ref.overlap(queries)
+    total = ref.get_sizes()[tag]
+    pval = _binom_test(hit,total,total/len(whole),alternative=mode)
+    return _batch_table(names,ref.keys,query,tag,pval,hit,total,correction,focus)
+
+
+def _binom_test(x,n,p,alternative="greater",size:int=1 << 22):
+    """
+    binomial test of many (x,n,p) at once
+    p values are identical to scipy.stats.binom_test (scipy<1.12) of each one:
+    the two-sided ones sum the probabilities of the other tail not above that of x,
+    counted over the concatenated ranges of all the tests in chunks
+
+    Parameters
+    ----------
+    x,n: 1d array
+        the number of successes and trials
+
+    p: 1d array
+        the hypothesized probability of success
+
+    alternative: str
+        "two-sided", "less", "greater"
+
+    size: int
+        approximate number of the probabilities evaluated at once
+
+    """
+    x = np.asarray(x,dtype=np.int64)
+    n = np.asarray(n,dtype=np.int64)
+    p = np.asarray(p,dtype=np.float64)
+    if np.any(n < x):
+        raise ValueError("n must be >= x")
+    if np.any((p > 1.0) | (p < 0.0)):
+        raise ValueError("p must be in range [0,1]")
+    binom = stats.binom
+    if alternative=="less":
+        return binom.cdf(x,n,p)
+    elif alternative=="greater":
+        return binom.sf(x - 1,n,p)
+    elif alternative!="two-sided":
+        raise ValueError("alternative not recognized\nshould be 'two-sided', 'less' or 'greater'")
+    d = binom.pmf(x,n,p)*(1 + 1e-7)
+    pn = p*n
+    pval = np.ones(len(x),dtype=np.float64)
+    ### the other tail is above pn
+    low = np.flatnonzero(x < pn)
+    if len(low) > 0:
+        start = np.ceil(pn[low])
+        y = _count_below(start,n[low] + 1 - start,n[low],p[low],d[low],size)
+        pval[low] = binom.cdf(x[low],n[low],p[low]) + binom.sf(n[low] - y,n[low],p[low])
+    ### the other tail is below pn
+    high = np.flatnonzero(x > pn)
+    if len(high) > 0:
+        length = np.floor(pn[high]) + 1
+        y = _count_below(np.zeros(len(high)),length,n[high],p[high],d[high],size)
+        pval[high] = binom.cdf(y - 1,n[high],p[high]) + binom.sf(x[high] - 1,n[high],p[high])
+    return np.minimum(1.0,pval)
+
+
+def _count_below(start,length,n,p,d,size:int=1 << 22):
+    """ the number of i in [start,start + length) with binom.pmf(i,n,p) <= d for each test """
+    length = length.astype(np.int64)
+    res = np.zeros(len(n),dtype=np.int64)
+    cum = np.cumsum(length)
+    s = 0
+    while s < len(n):
+        # tests whose ranges are evaluated together
+        e = max(s + 1,np.searchsorted(cum,cum[s] - length[s] + size,side="right"))
+        seg = np.repeat(np.arange(s,e),length[s:e])
+        offset = np.arange(len(seg)) - np.repeat(cum[s:e] - length[s:e] - (cum[s] - length[s]),length[s:e])
+        i = start[seg] + offset
+        below = stats.binom.pmf(i,n[seg],p[seg]) <= d[seg]
+        res[s:e] = np.bincount(seg - s,weights=below,minlength=e - s).astype(np.int64)
+        s = e
+    return res
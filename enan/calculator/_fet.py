@@ -1,104 +1,250 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Mon Sep 23 12:59:35 2019
-
-Fisher's exact test
-
-@author: tadahaya
-"""
-import pandas as pd
-import numpy as np
-import scipy.stats as stats
-import statsmodels.stats.multitest as multitest
-from scipy.stats import rankdata
-
-class Calculator():
-    def __init__(self):
-        self.res = pd.DataFrame()
-
-
-    def calc(self,obj,ref,whole,focus=None,**kwargs):
-        self.res = do_fet(obj,ref,whole,focus=None,**kwargs)
-        return self.res
-
-
-    def get_details(self):
-        return self.res
-
-
-def do_fet(obj,ref,whole,correction="fdr_bh",focus=None,mode="greater"):
-    """
-    conduct Fisher's exact test p value corrected for multiple tests
-    all elements should be given as ID, except for term
-    
-    Parameters
-    ----------
-    obj: set
-        a set of variables in signature of interest
-        
-    ref: dict
-        a dict of term and member list of datasets
-
-    whole: set
-        a set of whole variables adjusted between datasets and interest 
-        
-    correction: str
-        indicate method for correcting multiple tests
-        depend on "statsmodels.stats.multitest.multipletests"
-        
-    focus: int
-        export results by XX th lowest p value
-    
-    mode: int
-        indicate the type of test
-        "two-sided", "less", "greater"
-        in many case of ontology analysis, "greater" is appropriate
-
-    ### contingency table ###
-                      signature(+)  signature(-)  sum
-    
-    dataset var (+)       n11           n12       n1p
-    
-    dataset var (-)       n21           n22       n2p
-    
-        sum               np1           np2       npp
-
-    """
-    pval = []
-    overlap = []
-    total = []
-    hit = []
-    ap = pval.append
-    ap2 = overlap.append
-    ap3 = total.append
-    ap4 = hit.append
-    np1 = len(obj)
-    np2 = len(whole) - np1
-    keys = list(ref.keys())
-    values = list(ref.values())
-    for m in values:
-        inter = obj & m
-        n11 = len(inter)
-        n12 = len(m) - n11
-        x = np.array([[n11,n12],[np1 - n11,np2 - n12]])
-        ap(stats.fisher_exact(x,alternative=mode)[1])
-        ap2(inter)
-        ap3(len(m))
-        ap4(n11)
-    if len(pval)==0:
-        res = pd.DataFrame(columns=["p value","adjusted p value","overlap","hit No.",
-                                    "total No."])
-    else:
-        res = pd.DataFrame({"p value":pval,"overlap":overlap,
-                            "hit No.":hit,"total No.":total},index=keys)
-        fxn = lambda x: len(x) > 0
-        res = res[res["overlap"].map(fxn)]
-        if res.shape[0]!=0:
-            res["adjusted p value"] = multitest.multipletests(res["p value"],alpha=0.05,method=correction)[1]
-            res = res.sort_values(by="p value")
-            res = res.loc[:,["p value","adjusted p value","overlap","hit No.","total No."]] # sort
-    if (focus is None) or (res.shape[0]==0):
-        pass
-    else:
-        res = res.iloc[:focus,:]
-    return res
\ No newline at end of file
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Sep 23 12:59:35 2019
+
+Fisher's exact test
+
+@author: tadahaya
+"""
+import pandas as pd
+import numpy as np
+import scipy.stats as stats
+import statsmodels.stats.multitest as multitest
+from scipy.stats import rankdata
+
+from ._ref import RefMatrix,_batch_input,_batch_table,_touched
+
+class Calculator():
+    def __init__(self):
+        self.res = pd.DataFrame()
+
+
+    def calc(self,obj,ref,whole,focus=None,**kwargs):
+        self.res = do_fet(obj,ref,whole,focus=None,**kwargs)
+        return self.res
+
+
+    def calc_batch(self,obj,ref,whole,**kwargs):
+        self.res = do_fet_batch(obj,ref,whole,**kwargs)
+        return self.res
+
+
+    def get_details(self):
+        return self.res
+
+
+def do_fet(obj,ref,whole,correction="fdr_bh",focus=None,mode="greater"):
+    """
+    conduct Fisher's exact test p value corrected for multiple tests
+    all elements should be given as ID, except for term
+    
+    Parameters
+    ----------
+    obj: set
+        a set of variables in signature of interest
+        
+    ref: dict or RefMatrix
+        a dict of term and member list of datasets
+        or the compiled one, whose inverted index is reused between calls
+
+    whole: set
+        a set of whole variables adjusted between datasets and interest 
+        
+    correction: str
+        indicate method for correcting multiple tests
+        depend on "statsmodels.stats.multitest.multipletests"
+        
+    focus: int
+        export results by XX th lowest p value
+    
+    mode: int
+        indicate the type of test
+        "two-sided", "less", "greater"
+        in many case of ontology analysis, "greater" is appropriate
+
+    ### contingency table ###
+                      signature(+)  signature(-)  sum
+    
+    dataset var (+)       n11           n12       n1p
+    
+    dataset var (-)       n21           n22       n2p
+    
+        sum               np1           np2       npp
+
+    """
+    np1 = len(obj)
+    np2 = len(whole) - np1
+    if not isinstance(ref,RefMatrix):
+        ref = RefMatrix(ref)
+    # only the terms sharing members with obj are tested, the others are omitted anyway
+    keys,overlap,hit,total = _touched(obj,ref)
+    pval = _fisher_exact(hit,total - hit,np1 - hit,np2 - total + hit,alternative=mode)
+    if len(ref.keys)==0:
+        res = pd.DataFrame(columns=["p value","adjusted p value","overlap","hit No.",
+                                    "total No."])
+    else:
+        res = pd.DataFrame({"p value":pval,"overlap":overlap,
+                            "hit No.":hit,"total No.":total},index=keys)
+        if res.shape[0]!=0:
+            res["adjusted p value"] = multitest.multipletests(res["p value"],alpha=0.05,method=correction)[1]
+            res = res.sort_values(by="p value")
+            res = res.loc[:,["p value","adjusted p value","overlap","hit No.","total No."]] # sort
+    if (focus is None) or (res.shape[0]==0):
+        pass
+    else:
+        res = res.iloc[:focus,:]
+    return res
+
+
+def do_fet_batch(obj,ref,whole,correction="fdr_bh",focus=None,mode="greater"):
+    """
+    conduct Fisher's exact test of many query sets against the reference at once
+    the overlap counts of all the pairs are obtained by one sparse matrix product
+    and the pairs without overlap are omitted as in do_fet
+
+    Parameters
+    ----------
+    obj: dict or list
+        query sets like {"query1":{"aa","bb"},...}, named 0,1,2,... if a list
+
+    ref: dict or RefMatrix
+        a dict of term and member list of datasets
+
+    whole: set
+        a set of whole variables adjusted between datasets and interest
+
+    correction: str
+        indicate method for correcting multiple tests, applied for each query
+        depend on "statsmodels.stats.multitest.multipletests"
+
+    focus: int
+        export results by XX th lowest p value of each query
+
+    mode: str
+        indicate the type of test
+        "two-sided", "less", "greater"
+
+    Returns res
+    ----------
+    res: dataframe
+        long-format table of query x term with
+        ["query","term","p value","adjusted p value","hit No.","total No."],
+        sorted by p value in each query
+
+    """
+    names,queries,ref = _batch_input(obj,ref)
+    query,tag,hit = ref.overlap(queries)
+    np1 = np.array([len(v) for v in queries],dtype=np.int64)[query]
+    np2 = len(whole) - np1
+    total = ref.get_sizes()[tag]
+    pval = _fisher_exact(hit,total - hit,np1 - hit,np2 - total + hit,alternative=mode)
+    return _batch_table(names,ref.keys,query,tag,pval,hit,total,correction,focus)
+
+
+def _fisher_exact(c00,c01,c10,c11,alternative="greater"):
+    """
+    Fisher's exact test of many 2x2 tables [[c00,c01],[c10,c11]] at once
+    p values are identical to scipy.stats.fisher_exact of each table:
+    the one-sided ones are given by hypergeom.cdf, and the two-sided ones
+    by the probabilities of the other tail beyond the mode found by a vectorized binary search
+
+    Parameters
+    ----------
+    c00,c01,c10,c11: 1d array
+        integer entries of the tables
+
+    alternative: str
+        "two-sided", "less", "greater"
+
+    """
+    c00,c01,c10,c11 = [np.asarray(v,dtype=np.int64) for v in (c00,c01,c10,c11)]
+    if np.any(c00 < 0) or np.any(c01 < 0) or np.any(c10 < 0) or np.any(c11 < 0):
+        raise ValueError("All values in `table` must be nonnegative.")
+    pval = np.ones(c00.shape,dtype=np.float64)
+    # the tables with an empty row or column are 1
+    valid = np.flatnonzero((c00 + c01 > 0) & (c10 + c11 > 0) & (c00 + c10 > 0) & (c01 + c11 > 0))
+    c00,c01,c10,c11 = c00[valid],c01[valid],c10[valid],c11[valid]
+    n1 = c00 + c01
+    M = n1 + c10 + c11
+    n = c00 + c10
+    hypergeom = stats.hypergeom
+    if alternative=="less":
+        p = hypergeom.cdf(c00,M,n1,n)
+    elif alternative=="greater":
+        p = hypergeom.cdf(c01,M,n1,c01 + c11)
+    elif alternative=="two-sided":
+        mode = ((n + 1)*(n1 + 1)/(M + 2)).astype(np.int64)
+        pexact = hypergeom.pmf(c00,M,n1,n)
+        pmode = hypergeom.pmf(mode,M,n1,n)
+        epsilon = 1e-14
+        gamma = 1 + epsilon
+        p = np.ones(len(valid),dtype=np.float64)
+        with np.errstate(divide="ignore",invalid="ignore"):
+            near = np.abs(pexact - pmode)/np.maximum(pexact,pmode) <= epsilon
+        ### lower tail
+        low = np.flatnonzero(~near & (c00 < mode))
+        if len(low) > 0:
+            args = (M[low],n1[low],n[low])
+            p[low] = hypergeom.cdf(c00[low],*args)
+            other = hypergeom.pmf(n[low],*args) <= pexact[low]*gamma
+            sub = low[other]
+            if len(sub) > 0:
+                args = (M[sub],n1[sub],n[sub])
+                guess = _binary_search(lambda x,i: -hypergeom.pmf(x,*[v[i] for v in args]),
+                                       -pexact[sub]*gamma,mode[sub],n[sub])
+                p[sub] += hypergeom.sf(guess,*args)
+        ### upper tail
+        up = np.flatnonzero(~near & (c00 >= mode))
+        if len(up) > 0:
+            args = (M[up],n1[up],n[up])
+            p[up] = hypergeom.sf(c00[up] - 1,*args)
+            other = hypergeom.pmf(0,*args) <= pexact[up]*gamma
+            sub = up[other]
+            if len(sub) > 0:
+                args = (M[sub],n1[sub],n[sub])
+                guess = _binary_search(lambda x,i: hypergeom.pmf(x,*[v[i] for v in args]),
+                                       pexact[sub]*gamma,np.zeros(len(sub),dtype=np.int64),mode[sub])
+                p[sub] += hypergeom.cdf(guess,*args)
+    else:
+        raise ValueError("`alternative` should be one of {'two-sided', 'less', 'greater'}")
+    pval[valid] = np.minimum(p,1.0)
+    return pval
+
+
+def _binary_search(a,d,lo,hi):
+    """
+    binary search of scipy (a(i) <= d < a(i + 1)) conducted for many functions at once
+
+    Parameters
+    ----------
+    a: function
+        a(x,i) gives the values of the functions i at x, ascending between lo and hi
+
+    d: 1d array
+        the values to be searched
+
+    lo,hi: 1d array
+        the ends of the ranges
+
+    """
+    lo = lo.copy()
+    hi = hi.copy()
+    res = np.zeros(len(d),dtype=np.int64)
+    found = np.zeros(len(d),dtype=bool)
+    active = lo < hi
+    while np.any(active):
+        i = np.flatnonzero(active)
+        mid = lo[i] + (hi[i] - lo[i])//2
+        midval = a(mid,i)
+        less = midval < d[i]
+        more = midval > d[i]
+        lo[i[less]] = mid[less] + 1
+        hi[i[more]] = mid[more] - 1
+        equal = i[~less & ~more]
+        res[equal] = mid[~less & ~more]
+        found[equal] = True
+        active = ~found & (lo < hi)
+    rest = np.flatnonzero(~found)
+    if len(rest) > 0:
+        res[rest] = np.where(a(lo[rest],rest) <= d[rest],lo[rest],lo[rest] - 1)
+    return res
@@ -1,385 +1,1730 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Tue Jan 14 15:48:00 2020
-
-Gene set enrichment analysis
-
-@author: tadahaya
-"""
-import pandas as pd
-import numpy as np
-
-### preprocessing ###
-class Process():
-    """ prepare data to be analyzed """
-    def __init__(self):
-        self.__process = GSEAProcess()
-
-    def do(self,data,ref,**kwargs):
-        return self.__process.do(data,ref,**kwargs)
-
-    def to_gsea(self):
-        self.__process = GSEAProcess()
-
-    def to_ssgsea(self):
-        self.__process = ssGSEAProcess()
-
-    def to_expssgsea(self):
-        self.__process = ExpssGSEAProcess()
-
-
-class GSEAProcess():
-    def do(self,data,ref):
-        """
-        prepare target data for GSEA
-        
-        data: series
-            a series of interest data
-
-        """
-        return data.sort_values(ascending=False),ref
-
-
-class ssGSEAProcess():
-    def do(self,data,ref,fterm):
-        """
-        prepare target data for ssGSEA focused mode
-        
-        data: dataframe
-            a dataframe of interest data (feature x sample)
-        
-        fterm: str
-            a term of interest in refrence data set
-        
-        """
-        return _sort_data(data),ref[fterm]
-
-
-class ExpssGSEAProcess():
-    def do(self,data,ref):
-        """
-        prepare target data for ssGSEA exploratory mode
-        
-        data: series
-            a series of interest data
-
-        """
-        return data.sort_values(ascending=False),ref
-
-
-### scoreing method ###
-class Method():
-    """ indicate scoreing method of enrichment scores for output """
-    def __init__(self):
-        self.__method = StandardMethod()
-
-    def calc(self,es,names):
-        return self.__method.calc(es,names)
-
-    def to_standard(self):
-        self.__method = StandardMethod()
-
-    def to_kuiper(self):
-        self.__method = KuiperMethod()
-
-    def to_gsva(self):
-        self.__method = GSVAMethod()
-
-
-class StandardMethod():
-    def calc(self,es,names):
-        """ calculate Enrichment score from es with the standard method """
-        res = pd.DataFrame(np.max(np.abs(es),axis=0),index=names,
-                            columns=["ES"]).sort_values(by="ES",ascending=False)
-        return res
-
-
-class KuiperMethod():
-    def calc(self,es,names):
-        """ calculate Enrichment score from es with the method in Kuiper method """
-        res = pd.DataFrame(np.abs(np.max(es,axis=0)) + np.abs(np.min(es,axis=0)),
-                            index=names,columns=["ES"]).sort_values(by="ES",ascending=False)
-        return res
-
-
-class GSVAMethod():
-    def calc(self,es,names):
-        """ calculate Enrichment score from es with the method in GSVA """
-        maxi = np.max(es,axis=0)
-        mini = np.min(es,axis=0)
-        res = pd.DataFrame(np.where(maxi < 0,0,maxi) - np.where(mini > 0,0,mini),
-                            index=names,columns=["ES"]).sort_values(by="ES",ascending=False)
-        return res
-
-
-### Algorithm ###
-class Algorithm():
-    """ indicate analysis algorithm """
-    def __init__(self,):
-        self.__algorithm = GSEAAlgorithm()
-
-    def calc(self,data,tag,alpha):
-        """
-        Returns: (es,keys,loc)
-        ----------
-        es: 2d array
-            enrichment scores of each location (feature x tag/sample)
-
-        keys: list
-            tag names or sample names for output
-
-        loc: 2d array
-            location of tag-positive elements in data (tag/sample x feature)
-
-        """
-        return self.__algorithm.calc(data,tag,alpha)
-
-    def to_gsea(self):
-        self.__algorithm = GSEAAlgorithm()
-
-    def to_ssgsea(self):
-        self.__algorithm = ssGSEAAlgorithm()
-
-    def to_expssgsea(self):
-        self.__algorithm = ExpssGSEAAlgorithm()
-
-
-class GSEAAlgorithm():
-    def calc(self,data,tag,alpha=0):
-        """
-        standard GSEA algorithm
-        
-        Parameters
-        ----------
-        data: series
-            a sorted series of interest data in descending order (high values get high ranks)
-            
-        tag: dict
-            keys: group name
-            values: members of each group
-
-        """
-        keys = list(tag.keys())
-        values = list(tag.values())
-        sorted_list = list(data.index)
-        sorted_val = np.abs(list(data))
-        n = len(sorted_list)
-        ### grasp where the tagged genes
-        loc = _location(sorted_list,values)
-        ### calculate posi
-        posi0 = np.power(sorted_val,alpha)*loc
-        den_p = np.sum(posi0,axis=1)
-        posi = _accumulative(posi0,axis=1)/den_p
-        ### calculate nega
-        nega0 = 1 - loc
-        # n_nh = n - np.array([len(v) for v in values])
-        n_nh = np.sum(nega0,axis=1) # 211014
-        nega = _accumulative(nega0,axis=1)/n_nh
-        ### calculate ES
-        es = posi - nega
-        return es,keys,loc
-
-
-class ssGSEAAlgorithm():
-    def calc(self,data,tag,alpha=0.25):
-        """
-        ssGSEA focusing on a tag
-        
-        Parameters
-        ----------
-        data: dataframe
-            a dataframe composed of sorted features (descending; high values get high ranks)
-            each column corresponds to each sample
-            
-        tag: set
-            a set of elements constituting a signature        
-        
-        """
-        keys = list(data.columns)
-        n = data.shape[0]
-        ### grasp where the tagged genes
-        tag = list(tag)
-        loc = data.replace(tag,1).T
-        loc = (loc.values==1)
-        ### calculate posi
-        full = np.arange(1,n + 1,1)[::-1]
-        posi0 = np.power(full,alpha)*loc
-        den_p = np.sum(posi0,axis=1)
-        posi = _accumulative(posi0,axis=1)/den_p
-        ### calculate nega
-        nega0 = 1 - loc
-        n_nh = np.sum(nega0,axis=1)
-        nega = _accumulative(nega0,axis=1)/n_nh
-        ### calculate ES
-        es = posi - nega
-        return es,keys,loc
-
-
-class ExpssGSEAAlgorithm():
-    def calc(self,data,tag,alpha=0.25):
-        """
-        ssGSEA for exploratory analysis by searching whole tags
-        
-        Parameters
-        ----------
-        data: series
-            a sorted series of interest data in descending order (high values get high ranks)
-            
-        tag: dict
-            keys: group name
-            values: members of each group
-        
-        """        
-        keys = list(tag.keys())
-        values = list(tag.values())
-        data = list(data.index)
-        n = len(data)
-        ### grasp where the tagged genes
-        loc = _location(data,values)
-        ### calculate posi
-        full = np.arange(1,n + 1,1)[::-1]
-        posi0 = np.power(full,alpha)*loc
-        den_p = np.sum(posi0,axis=1)
-        posi = _accumulative(posi0,axis=1)/den_p
-        ### calculate nega
-        nega0 = 1 - loc
-        n_nh = np.sum(nega0,axis=1)
-        nega = _accumulative(nega0,axis=1)/n_nh
-        ### calculate ES
-        es = posi - nega
-        return es,keys,loc
-
-
-### Context ###
-class Calculator():
-    """ GSEA client """
-    def __init__(self):
-        self.__process = Process()
-        self.__algorithm = Algorithm()
-        self.__method = Method()
-        self.es = np.array([[],[]]) # for plot
-        self.loc = np.array([[],[]]) # for plot
-        self.keys = []
-        self.res = pd.DataFrame()
-
-
-    def calc(self,obj,ref,alpha,**kwargs):
-        """
-        conduct GSEA
-
-        Parameters
-        ----------
-        alpha: float, (0,1]
-            indicate weight of center
-            0.25 is derived from the original paper of ssGSEA (Barbie,et al.,2009)
-        
-        fterm: str
-            a term of interest in refrence data set
-
-        """
-        obj,tag = self.__process.do(obj,ref,**kwargs)
-        self.es,self.keys,self.loc = self.__algorithm.calc(obj,tag,alpha)
-        self.res = self.__method.calc(self.es,self.keys)
-        return self.res
-
-
-    def get_details(self):
-        """
-        obtain detailed data for visualization
-
-        Returns (es,loc,keys,res)
-        ----------
-        es: 2d array
-            enrichment scores of each location (feature x tag/sample)
-
-        loc: 2d array
-            location of tag-positive elements in data (tag/sample x feature)
-
-        keys: list
-            tag names or sample names for output
-
-        """
-        return self.es,self.loc,self.keys,self.res
-
-
-    def to_gsea(self):
-        self.__process.to_gsea()
-        self.__algorithm.to_gsea()
-
-    def to_ssgsea(self):
-        self.__process.to_ssgsea()
-        self.__algorithm.to_ssgsea()
-
-    def to_expssgsea(self):
-        self.__process.to_expssgsea()
-        self.__algorithm.to_expssgsea()
-
-    def to_standard(self):
-        self.__method.to_standard()
-
-    def to_kuiper(self):
-        self.__method.to_kuiper()
-
-    def to_gsva(self):
-        self.__method.to_gsva()
-
-
-### Common Functions ###
-def _location(data,tags):
-    """
-    determine the location of the interest elements in a sample
-    returns tag No. x feature No. matrix
-    
-    Parameters
-    ----------
-    data: list
-        sorted list by values (descending)
-
-    tags: list
-        a list of tag sets
-
-    """
-    res = []
-    ap = res.append
-    for tag in tags:
-         ap([(ele in tag) for ele in data])
-    return np.array(res)
-
-
-def _accumulative(X,axis=0):
-    """
-    calculate accumulative sum
-    
-    Parameters
-    ----------
-    axis: 0 or 1
-        determine sum direction
-    
-    """
-    if axis==1:
-        X = X.T
-    x = np.zeros(X.shape[1])
-    res = []
-    ap = res.append
-    for v in X:
-        x += v
-        ap(x.copy())
-    res = np.array(res)
-    return res
-
-
-def _sort_data(df,ascending=False):
-    """
-    sort dataframe by values in columns and return corresponding indices
-    
-    Parameters
-    ----------
-    df: dataframe
-
-    ascending: boolean
-        indicates sort direction
-
-    """
-    col = list(df.columns)
-    res = list(map(lambda x: list(df[x].sort_values(ascending=ascending).index),col))
-    return pd.DataFrame(res,index=col).T
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Jan 14 15:48:00 2020
+
+Gene set enrichment analysis
+
+@author: tadahaya
+"""
+import pandas as pd
+import numpy as np
+from collections import OrderedDict
+from functools import partial
+import hashlib
+import os
+import statsmodels.stats.multitest as multitest
+from scipy.special import ndtr
+
+from ._pool import get_n_jobs,map_shared
+from ._ref import RefMatrix
+
+### null distribution ###
+class NullCache():
+    """
+    LRU cache of the null distributions of enrichment scores for permutation test
+    the null of gene set permutation does not depend on the members of a set,
+    so that sets sharing (feature No., set size, alpha, method) can reuse one null
+    the seed is a part of the key, a hit gives the same null as a fresh calculation
+    also for another library, since the drawn positions do not depend on the largest set
+
+    maxsize: int
+        the number of nulls kept in memory
+
+    spill: str
+        a directory where nulls evicted from memory are saved as .npy
+        and loaded again when required, None means no spill
+
+    """
+    def __init__(self,maxsize:int=4096,spill:str=None):
+        self.maxsize = maxsize
+        self.spill = spill
+        self.__data = OrderedDict()
+        if spill is not None:
+            os.makedirs(spill,exist_ok=True)
+
+
+    def __len__(self):
+        return len(self.__data)
+
+
+    def get(self,key):
+        """ get a null or None if not cached """
+        if key in self.__data:
+            self.__data.move_to_end(key)
+            return self.__data[key]
+        if self.spill is not None:
+            path = self.__path(key)
+            if os.path.exists(path):
+                val = np.load(path)
+                self.put(key,val)
+                return val
+        return None
+
+
+    def put(self,key,val):
+        """ store a null and evict the least recently used ones """
+        self.__data[key] = val
+        self.__data.move_to_end(key)
+        while len(self.__data) > self.maxsize:
+            k,v = self.__data.popitem(last=False)
+            if self.spill is not None:
+                np.save(self.__path(k),v)
+
+
+    def clear(self):
+        """ clear nulls in memory """
+        self.__data = OrderedDict()
+
+
+    def __path(self,key):
+        name = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.spill,name + ".npy")
+
+
+### preprocessing ###
+class Process():
+    """ prepare data to be analyzed """
+    def __init__(self):
+        self.__process = GSEAProcess()
+
+    def do(self,data,ref,**kwargs):
+        return self.__process.do(data,ref,**kwargs)
+
+    def to_gsea(self):
+        self.__process = GSEAProcess()
+
+    def to_ssgsea(self):
+        self.__process = ssGSEAProcess()
+
+    def to_expssgsea(self):
+        self.__process = ExpssGSEAProcess()
+
+
+class GSEAProcess():
+    def do(self,data,ref):
+        """
+        prepare target data for GSEA
+        
+        data: series
+            a series of interest data
+
+        """
+        return data.sort_values(ascending=False,kind="stable"),ref
+
+
+class ssGSEAProcess():
+    def do(self,data,ref,fterm):
+        """
+        prepare target data for ssGSEA focused mode
+        the data is ranked by the algorithm, so only the membership is prepared
+        
+        data: dataframe
+            a dataframe of interest data (feature x sample)
+        
+        fterm: str
+            a term of interest in refrence data set
+        
+        """
+        return data,data.index.isin(list(ref[fterm]))
+
+
+class ExpssGSEAProcess():
+    def do(self,data,ref):
+        """
+        prepare target data for ssGSEA exploratory mode
+        the data is ranked by the algorithm with an argsort, not sorted here
+        
+        data: series
+            a series of interest data
+
+        """
+        return data,ref
+
+
+### scoreing method ###
+class Method():
+    """ indicate scoreing method of enrichment scores for output """
+    def __init__(self):
+        self.__method = StandardMethod()
+
+    def calc(self,es,names):
+        return self.__method.calc(es,names)
+
+    def summarize(self,maxi,mini,names):
+        """ calculate Enrichment score from the maximum and the minimum of es """
+        return _to_frame(self.__method.score(maxi,mini),names)
+
+    def score(self,maxi,mini):
+        return self.__method.score(maxi,mini)
+
+    def get_name(self):
+        return type(self.__method).__name__
+
+    def to_standard(self):
+        self.__method = StandardMethod()
+
+    def to_kuiper(self):
+        self.__method = KuiperMethod()
+
+    def to_gsva(self):
+        self.__method = GSVAMethod()
+
+    def to_gsva_diff(self):
+        self.__method = GSVADiffMethod()
+
+
+class StandardMethod():
+    def calc(self,es,names):
+        """ calculate Enrichment score from es with the standard method """
+        return _to_frame(self.score(np.max(es,axis=0),np.min(es,axis=0)),names)
+
+    def score(self,maxi,mini):
+        """ the standard method from the maximum and the minimum of es """
+        return np.maximum(np.abs(maxi),np.abs(mini))
+
+
+class KuiperMethod():
+    def calc(self,es,names):
+        """ calculate Enrichment score from es with the method in Kuiper method """
+        return _to_frame(self.score(np.max(es,axis=0),np.min(es,axis=0)),names)
+
+    def score(self,maxi,mini):
+        """ Kuiper method from the maximum and the minimum of es """
+        return np.abs(maxi) + np.abs(mini)
+
+
+class GSVAMethod():
+    def calc(self,es,names):
+        """ calculate Enrichment score from es with the method in GSVA """
+        return _to_frame(self.score(np.max(es,axis=0),np.min(es,axis=0)),names)
+
+    def score(self,maxi,mini):
+        """ GSVA method from the maximum and the minimum of es """
+        return np.where(maxi < 0,0,maxi) - np.where(mini > 0,0,mini)
+
+
+class GSVADiffMethod():
+    def calc(self,es,names):
+        """ calculate Enrichment score from es with the max difference of GSVA (mx.diff) """
+        return _to_frame(self.score(np.max(es,axis=0),np.min(es,axis=0)),names)
+
+    def score(self,maxi,mini):
+        """ the largest positive deviation minus the largest negative one, as in GSVA """
+        return np.where(maxi < 0,0,maxi) + np.where(mini > 0,0,mini)
+
+
+### Algorithm ###
+class Algorithm():
+    """ indicate analysis algorithm """
+    def __init__(self,):
+        self.__algorithm = GSEAAlgorithm()
+
+    def calc(self,data,tag,alpha):
+        """
+        Returns: (es,keys,loc)
+        ----------
+        es: 2d array
+            enrichment scores of each location (feature x tag/sample)
+
+        keys: list
+            tag names or sample names for output
+
+        loc: 2d array
+            location of tag-positive elements in data (tag/sample x feature)
+
+        """
+        return self.__algorithm.calc(data,tag,alpha)
+
+    def extremum(self,data,tag,alpha,dtype=np.float64):
+        """
+        Returns: (maxi,mini,keys)
+        ----------
+        maxi,mini: 1d array
+            maximum and minimum of the running enrichment score of each tag/sample
+            obtained without materializing es
+
+        keys: list
+            tag names or sample names for output
+
+        """
+        return self.__algorithm.extremum(data,tag,alpha,dtype=dtype)
+
+    def extremum_matrix(self,data,tag,alpha,**kwargs):
+        """
+        kwargs are passed to _matrix_extremum
+        (n_jobs, dtype, chunk_size, memory_limit, leading_edge and score)
+        (score,keys) is returned instead when score is given
+
+        Returns: (maxi,mini,keys)
+        ----------
+        maxi,mini: 2d array
+            maximum and minimum of the running enrichment score (tag x sample)
+
+        keys: list
+            tag names for output
+
+        """
+        return self.__algorithm.extremum_matrix(data,tag,alpha,**kwargs)
+
+    def extremum_sketch(self,data,tag,alpha,bins:int=64):
+        """
+        approximate extrema from a sketch of the ranking with their error bounds
+
+        Returns: (maxi,mini,err_max,err_min,keys)
+        ----------
+        maxi,mini: 2d array
+            approximate maximum and minimum of the running enrichment score (tag x sample)
+
+        err_max,err_min: 2d array
+            upper bounds of their absolute errors (tag x sample)
+
+        keys: list
+            tag names for output
+
+        """
+        return self.__algorithm.extremum_sketch(data,tag,alpha,bins=bins)
+
+    def weight(self,val,alpha):
+        """
+        Returns: weight
+        ----------
+        weight: 2d array
+            weight of each position from the sorted values (sample x feature)
+
+        """
+        return self.__algorithm.weight(val,alpha)
+
+    def to_gsea(self):
+        self.__algorithm = GSEAAlgorithm()
+
+    def to_ssgsea(self):
+        self.__algorithm = ssGSEAAlgorithm()
+
+    def to_expssgsea(self):
+        self.__algorithm = ExpssGSEAAlgorithm()
+
+    def to_gsva(self):
+        self.__algorithm = GSVAAlgorithm()
+
+
+class GSEAAlgorithm():
+    def calc(self,data,tag,alpha=0):
+        """
+        standard GSEA algorithm
+        
+        Parameters
+        ----------
+        data: series
+            a sorted series of interest data in descending order (high values get high ranks)
+            
+        tag: dict or RefMatrix
+            keys: group name
+            values: members of each group
+
+        """
+        tag = _compile(tag)
+        keys = tag.keys
+        sorted_val = np.abs(data.values)
+        ### grasp where the tagged genes
+        loc = tag.location(data.index)
+        ### calculate posi
+        posi0 = np.power(sorted_val,alpha)*loc
+        den_p = np.sum(posi0,axis=1)
+        posi = _accumulative(posi0,axis=1)/den_p
+        ### calculate nega
+        nega0 = 1 - loc
+        # n_nh = n - np.array([len(v) for v in values])
+        n_nh = np.sum(nega0,axis=1) # 211014
+        nega = _accumulative(nega0,axis=1)/n_nh
+        ### calculate ES
+        es = posi - nega
+        return es,keys,loc
+
+
+    def extremum(self,data,tag,alpha=0,dtype=np.float64):
+        """ extrema of the running sum of the standard GSEA algorithm """
+        tag = _compile(tag)
+        row,pos = tag.position(data.index)
+        weight = np.power(np.abs(data.values.astype(dtype)),alpha)
+        maxi,mini = _hit_extremum(row,pos,weight,len(tag.keys),dtype=dtype)
+        return maxi,mini,tag.keys
+
+
+    def extremum_matrix(self,data,tag,alpha=0,**kwargs):
+        """
+        extrema of the running sum of the standard GSEA algorithm for all samples
+        
+        Parameters
+        ----------
+        data: dataframe
+            feature x sample dataframe (not sorted)
+        
+        """
+        fxn = partial(self.weight,alpha=alpha) # picklable for the process pool
+        return _matrix_extremum(data,_compile(tag),fxn,**kwargs)
+
+
+    def weight(self,val,alpha=0):
+        """ weight of each position given by the sorted values (sample x feature) """
+        return np.power(np.abs(val),alpha)
+
+
+class ssGSEAAlgorithm():
+    def calc(self,data,tag,alpha=0.25):
+        """
+        ssGSEA focusing on a tag
+        
+        Parameters
+        ----------
+        data: dataframe
+            feature x sample dataframe (not sorted)
+            
+        tag: 1d array
+            boolean membership of the features in the tag
+        
+        """
+        keys = list(data.columns)
+        n = data.shape[0]
+        ### grasp where the tagged genes
+        pos = _rank_codes(data,np.flatnonzero(tag))
+        loc = np.zeros((len(keys),n),dtype=bool)
+        np.put_along_axis(loc,pos,True,axis=1)
+        ### calculate posi
+        full = np.arange(1,n + 1,1)[::-1]
+        posi0 = np.power(full,alpha)*loc
+        den_p = np.sum(posi0,axis=1)
+        posi = _accumulative(posi0,axis=1)/den_p
+        ### calculate nega
+        nega0 = 1 - loc
+        n_nh = np.sum(nega0,axis=1)
+        nega = _accumulative(nega0,axis=1)/n_nh
+        ### calculate ES
+        es = posi - nega
+        return es,keys,loc
+
+
+    def extremum(self,data,tag,alpha=0.25,dtype=np.float64):
+        """
+        extrema of the running sum of ssGSEA focusing on a tag
+        the samples are the rows of one call, scored from the ranks of the members
+        
+        """
+        keys = list(data.columns)
+        n = data.shape[0]
+        pos = _rank_codes(data,np.flatnonzero(tag))
+        weight = np.power(np.arange(1,n + 1,1)[::-1],alpha)
+        maxi,mini = _hit_extremum(np.zeros(pos.shape[1],dtype=int),pos,weight,1,dtype=dtype)
+        return maxi[:,0],mini[:,0],keys
+
+
+    def weight(self,val,alpha=0.25):
+        """ weight of each position given by the rank, shared by samples """
+        return np.power(np.arange(val.shape[1],0,-1),alpha)[None,:]
+
+
+class ExpssGSEAAlgorithm():
+    def calc(self,data,tag,alpha=0.25):
+        """
+        ssGSEA for exploratory analysis by searching whole tags
+        
+        Parameters
+        ----------
+        data: series
+            a series of interest data (not sorted)
+            
+        tag: dict or RefMatrix
+            keys: group name
+            values: members of each group
+        
+        """        
+        tag = _compile(tag)
+        keys = tag.keys
+        n = data.shape[0]
+        ### grasp where the tagged genes
+        row,rows = tag.members(data.index)
+        loc = np.zeros((len(keys),n),dtype=bool)
+        loc[row,_rank_codes(data,rows)[0]] = True
+        ### calculate posi
+        full = np.arange(1,n + 1,1)[::-1]
+        posi0 = np.power(full,alpha)*loc
+        den_p = np.sum(posi0,axis=1)
+        posi = _accumulative(posi0,axis=1)/den_p
+        ### calculate nega
+        nega0 = 1 - loc
+        n_nh = np.sum(nega0,axis=1)
+        nega = _accumulative(nega0,axis=1)/n_nh
+        ### calculate ES
+        es = posi - nega
+        return es,keys,loc
+
+
+    def extremum(self,data,tag,alpha=0.25,dtype=np.float64):
+        """ extrema of the running sum of ssGSEA for exploratory analysis """
+        tag = _compile(tag)
+        n = data.shape[0]
+        row,rows = tag.members(data.index)
+        pos = _rank_codes(data,rows)[0]
+        weight = np.power(np.arange(1,n + 1,1)[::-1],alpha)
+        maxi,mini = _hit_extremum(row,pos,weight,len(tag.keys),dtype=dtype)
+        return maxi,mini,tag.keys
+
+
+    def extremum_matrix(self,data,tag,alpha=0.25,**kwargs):
+        """
+        extrema of the running sum of ssGSEA for all samples and tags
+        
+        Parameters
+        ----------
+        data: dataframe
+            feature x sample dataframe (not sorted)
+        
+        """
+        fxn = partial(self.weight,alpha=alpha) # picklable for the process pool
+        return _matrix_extremum(data,_compile(tag),fxn,**kwargs)
+
+
+    def extremum_sketch(self,data,tag,alpha=0.25,bins:int=64):
+        """ approximate extrema of ssGSEA from rank bins, see _sketch_extremum """
+        tag = _compile(tag)
+        return _sketch_extremum(data,tag,partial(self.weight,alpha=alpha),bins=bins) + (tag.keys,)
+
+
+    def weight(self,val,alpha=0.25):
+        """ weight of each position given by the rank, shared by samples """
+        return np.power(np.arange(val.shape[1],0,-1),alpha)[None,:]
+
+
+class GSVAAlgorithm():
+    def calc(self,data,tag,alpha=1.0):
+        """
+        GSVA random walk for exploratory analysis (Hanzelmann, et al., 2013)
+        alpha is tau of GSVA, the exponent of the rank scores
+        
+        Parameters
+        ----------
+        data: series
+            a series of the kernel CDF statistics of a sample (not sorted), see _kernel_cdf
+            
+        tag: dict or RefMatrix
+            keys: group name
+            values: members of each group
+        
+        """
+        tag = _compile(tag)
+        keys = tag.keys
+        n = data.shape[0]
+        ### grasp where the tagged genes
+        row,rows = tag.members(data.index)
+        loc = np.zeros((len(keys),n),dtype=bool)
+        loc[row,_rank_codes(data,rows)[0]] = True
+        ### calculate posi
+        posi0 = self.weight(loc,alpha)*loc
+        den_p = np.sum(posi0,axis=1)
+        posi = _accumulative(posi0,axis=1)/den_p
+        ### calculate nega
+        nega0 = 1 - loc
+        n_nh = np.sum(nega0,axis=1)
+        nega = _accumulative(nega0,axis=1)/n_nh
+        ### calculate ES
+        es = posi - nega
+        return es,keys,loc
+
+
+    def extremum(self,data,tag,alpha=1.0,dtype=np.float64):
+        """ extrema of the GSVA random walk for exploratory analysis """
+        tag = _compile(tag)
+        n = data.shape[0]
+        row,rows = tag.members(data.index)
+        pos = _rank_codes(data,rows)[0]
+        weight = self.weight(np.zeros((1,n)),alpha)[0]
+        maxi,mini = _hit_extremum(row,pos,weight,len(tag.keys),dtype=dtype)
+        return maxi,mini,tag.keys
+
+
+    def extremum_matrix(self,data,tag,alpha=1.0,**kwargs):
+        """
+        extrema of the GSVA random walk for all samples and tags
+        
+        Parameters
+        ----------
+        data: dataframe
+            feature x sample dataframe of the kernel CDF statistics (not sorted)
+        
+        """
+        fxn = partial(self.weight,alpha=alpha) # picklable for the process pool
+        return _matrix_extremum(data,_compile(tag),fxn,**kwargs)
+
+
+    def extremum_sketch(self,data,tag,alpha=1.0,bins:int=64):
+        """ approximate extrema of the GSVA random walk from rank bins, see _sketch_extremum """
+        tag = _compile(tag)
+        return _sketch_extremum(data,tag,partial(self.weight,alpha=alpha),bins=bins) + (tag.keys,)
+
+
+    def weight(self,val,alpha=1.0):
+        """ rank score |n/2 - position| of GSVA, symmetric around the center and shared by samples """
+        n = val.shape[1]
+        return np.power(np.abs(n/2 - np.arange(n)),alpha)[None,:]
+
+
+### Context ###
+class Calculator():
+    """ GSEA client """
+    def __init__(self,keep_details:bool=True):
+        self.__process = Process()
+        self.__algorithm = Algorithm()
+        self.__method = Method()
+        self.es = np.array([[],[]]) # for plot
+        self.loc = np.array([[],[]]) # for plot
+        self.keys = []
+        self.res = pd.DataFrame()
+        self.leading = dict() # leading edge of each sample
+        self.bound = pd.DataFrame() # error bounds of calc_sketch
+        self.__cache = NullCache()
+        self.__keep = keep_details # whether es and loc are stored by calc for plot
+
+
+    def calc(self,obj,ref,alpha,curve:bool=False,dtype=np.float64,**kwargs):
+        """
+        conduct GSEA
+
+        Parameters
+        ----------
+        alpha: float, (0,1]
+            indicate weight of center
+            0.25 is derived from the original paper of ssGSEA (Barbie,et al.,2009)
+
+        curve: boolean
+            whether the full running sum (es) and loc are computed
+            if False, only the maximum and minimum are obtained from the hit positions
+            they are stored for plot only when keep_details is True
+
+        dtype: numpy dtype
+            float64 or float32 for the extrema, not used when curve is True
+        
+        fterm: str
+            a term of interest in refrence data set
+
+        """
+        obj,tag = self.__process.do(obj,ref,**kwargs)
+        if curve:
+            es,self.keys,loc = self.__algorithm.calc(obj,tag,alpha)
+            self.res = self.__method.calc(es,self.keys)
+            if self.__keep:
+                self.es,self.loc = es,loc
+            else:
+                self.es = np.array([[],[]])
+                self.loc = np.array([[],[]])
+        else:
+            self.es = np.array([[],[]])
+            self.loc = np.array([[],[]])
+            maxi,mini,self.keys = self.__algorithm.extremum(obj,tag,alpha,dtype=_check_dtype(dtype))
+            self.res = self.__method.summarize(maxi,mini,self.keys)
+        return self.res
+
+
+    def calc_matrix(self,obj,ref,alpha,n_jobs:int=1,dtype=np.float64,
+                    chunk_size:int=None,memory_limit:int=None,leading_edge:bool=False,
+                    sort:bool=True,normalize:bool=False):
+        """
+        conduct GSEA for all samples at once
+        the whole matrix is ranked and scored by blocks of samples
+
+        Parameters
+        ----------
+        obj: dataframe
+            feature x sample dataframe
+
+        ref: dict or RefMatrix
+            reference sets
+
+        alpha: float, (0,1]
+            indicate weight of center
+
+        n_jobs: int
+            the number of processes scoring the sample blocks, -1 means all the cpus
+
+        dtype: numpy dtype
+            float64 or float32 for the whole scoring
+            float32 halves the memory of the blocks,
+            the scores agree with float64 within 2/(feature No.) (see _check_dtype)
+
+        chunk_size: int
+            the number of sets scored at once, all the sets if None
+
+        memory_limit: int
+            approximate upper limit (bytes) of the working arrays
+            the library is processed in set blocks and the samples in sample blocks
+            so that the peak memory does not depend on the library size
+
+        leading_edge: boolean
+            whether the leading edge members are extracted in the scoring pass
+            from the peak position of each set, obtained by get_leading_edge()
+
+        sort: boolean
+            whether the result is sorted by the first sample
+            if False, tags are kept in the order of ref
+
+        normalize: boolean
+            whether the scores are divided by the maximum of each tag in place, see normalize()
+
+        Returns res
+        ----------
+        res: dataframe
+            enrichment scores (tag x sample) sorted by the first sample
+
+        """
+        # each block is scored into one preallocated tag x sample array
+        ref = _compile(ref)
+        res = self.__algorithm.extremum_matrix(obj,ref,alpha,n_jobs=n_jobs,dtype=_check_dtype(dtype),
+                                               chunk_size=chunk_size,memory_limit=memory_limit,
+                                               leading_edge=leading_edge,score=self.__method.score)
+        score,self.keys = res[:2]
+        if normalize:
+            score /= (1 - ref.get_sizes()/obj.shape[0])[:,None]
+        self.leading = dict()
+        if leading_edge:
+            for k,(indptr,indices) in zip(obj.columns,res[2]):
+                self.leading[k] = RefMatrix().from_csr(self.keys,obj.index,indptr,indices)
+        self.res = pd.DataFrame(score,index=self.keys,columns=obj.columns)
+        if sort and (self.res.shape[1] > 0):
+            self.res = self.res.sort_values(by=self.res.columns[0],ascending=False)
+        return self.res
+
+
+    def normalize(self,res,ref,n:int):
+        """
+        normalize enrichment scores with the maximum 1 - (set size)/n of each tag
+        by one broadcast division over the whole result
+
+        Parameters
+        ----------
+        res: dataframe
+            enrichment scores (tag x sample)
+
+        ref: dict or RefMatrix
+            reference sets including the tags of res
+
+        n: int
+            the number of features of the data
+
+        """
+        kmax = 1 - _compile(ref).get_sizes(res.index)/n
+        return pd.DataFrame(res.values/kmax[:,None],index=res.index,columns=res.columns)
+
+
+    def calc_sketch(self,obj,ref,alpha,bins:int=64,threshold:float=None,**kwargs):
+        """
+        approximate GSEA for all samples from a sketch of each ranking
+        the features are only binned by quantile breakpoints of each sample,
+        and the running sum is evaluated at the bin boundaries,
+        so that each tag costs O(bins) instead of its members after sorting
+
+        Parameters
+        ----------
+        obj: dataframe
+            feature x sample dataframe
+
+        ref: dict or RefMatrix
+            reference sets
+
+        alpha: float, (0,1]
+            indicate weight of center
+
+        bins: int
+            the number of rank bins of each sample
+
+        threshold: float
+            the pairs of tags and samples whose |score| + bound reaches threshold
+            are scored again exactly, only the tags and the samples including them
+            no rescoring if None
+
+        kwargs
+            n_jobs, dtype, chunk_size and memory_limit of the exact scoring, see calc_matrix()
+
+        Returns res
+        ----------
+        res: dataframe
+            enrichment scores (tag x sample) sorted by the first sample
+            the error bounds of the same shape are stored in bound (0 for the exact scores)
+
+        """
+        tag = _compile(ref)
+        maxi,mini,err_max,err_min,self.keys = self.__algorithm.extremum_sketch(obj,tag,alpha,bins=bins)
+        score = self.__method.score(maxi,mini)
+        bound = err_max + err_min # each method is changed by the errors of maxi and mini at most
+        if threshold is not None:
+            hit = np.abs(score) + bound >= threshold
+            rows = np.flatnonzero(hit.any(axis=1))
+            cols = np.flatnonzero(hit.any(axis=0))
+            if (len(rows) > 0) and (len(cols) > 0):
+                sub = tag.subset([self.keys[i] for i in rows])
+                kwargs["dtype"] = _check_dtype(kwargs.get("dtype",np.float64))
+                exact = self.__algorithm.extremum_matrix(obj.iloc[:,cols],sub,alpha,
+                                                         score=self.__method.score,**kwargs)[0]
+                score[np.ix_(rows,cols)] = exact
+                bound[np.ix_(rows,cols)] = 0
+        self.leading = dict()
+        self.res = pd.DataFrame(score,index=self.keys,columns=obj.columns)
+        if self.res.shape[1] > 0:
+            self.res = self.res.sort_values(by=self.res.columns[0],ascending=False)
+        self.bound = pd.DataFrame(bound,index=self.keys,columns=obj.columns).loc[self.res.index]
+        return self.res
+
+
+    def kcdf(self,obj,bins:int=512):
+        """
+        kernel CDF statistics of GSVA, each feature is compared across the samples
+        with a Gaussian kernel of the bandwidth sd/4 and converted into log odds
+
+        Parameters
+        ----------
+        obj: dataframe
+            feature x sample dataframe
+
+        bins: int
+            the number of grid points for each feature
+            the kernel is convolved on the binned samples by FFT,
+            O(feature x (sample + bins log bins)) instead of O(feature x sample^2),
+            the exact pairwise estimate if None
+
+        Returns res
+        ----------
+        res: dataframe
+            feature x sample dataframe of the statistics
+
+        """
+        return pd.DataFrame(_kernel_cdf(obj.values,bins=bins),index=obj.index,columns=obj.columns)
+
+
+    def running(self,obj,ref,alpha,fterm):
+        """
+        running sum of a single term for visualization
+        only the indicated term is located in the ranking
+
+        Parameters
+        ----------
+        obj: series
+            a series of interest data
+
+        ref: dict or RefMatrix
+            reference sets
+
+        alpha: float, (0,1]
+            indicate weight of center
+
+        fterm: str or int
+            indicate the term of interest or the corresponding No.
+
+        Returns (es,loc,leading)
+        ----------
+        es: 1d array
+            running enrichment score along the ranking
+
+        loc: 1d array
+            location of the members in the ranking
+
+        leading: list
+            members in the leading edge
+
+        """
+        # ranked as in calc_matrix, so that ties are broken in the same way
+        obj = obj.iloc[_rank_data(obj.values[None,:])[0][0]]
+        tag = _compile(ref)
+        if type(fterm)==int:
+            if fterm >= len(tag.keys):
+                raise ValueError("!! focused number is larger than the number of terms !!")
+            fterm = tag.keys[fterm]
+        loc = tag.subset([fterm]).location(obj.index)[0]
+        weight = self.__algorithm.weight(obj.values[None,:],alpha)[0]
+        es = _running(loc,weight)
+        leading = list(obj.index[_leading_edge(es,loc)])
+        return es,loc,leading
+
+
+    def calc_perm(self,obj,ref,alpha,n_perm:int=1000,seed:int=None,correction:str="fdr_bh",
+                  n_jobs:int=1,dtype=np.float64,chunk_size:int=None,memory_limit:int=None,
+                  leading_edge:bool=False):
+        """
+        conduct GSEA with gene set permutation test for all samples
+        the null of each set size is scored by the same engine as the enrichment scores
+        from random positions drawn at once for all the permutations
+
+        Parameters
+        ----------
+        obj: dataframe
+            feature x sample dataframe
+
+        ref: dict or RefMatrix
+            reference sets
+
+        alpha: float, (0,1]
+            indicate weight of center
+
+        n_perm: int
+            the number of permutations
+
+        seed: int
+            seed of random number generator
+
+        correction: str
+            indicate method for correcting multiple tests
+            depend on "statsmodels.stats.multitest.multipletests"
+
+        n_jobs: int
+            the number of processes scoring the enrichment scores
+
+        dtype: numpy dtype
+            float64 or float32 for the enrichment scores and the null distributions
+
+        chunk_size,memory_limit: int
+            the number of sets and the memory (bytes) for scoring, see calc_matrix
+
+        leading_edge: boolean
+            whether the leading edge members are extracted, see calc_matrix
+
+        Returns res
+        ----------
+        res: dataframe
+            tag x (sample,["ES","NES","p value","adjusted p value"])
+            sorted by ES of the first sample
+
+        """
+        tag = _compile(ref)
+        dtype = _check_dtype(dtype)
+        es = self.calc_matrix(obj,tag,alpha,n_jobs=n_jobs,dtype=dtype,
+                              chunk_size=chunk_size,memory_limit=memory_limit,
+                              leading_edge=leading_edge)
+        es = es.loc[tag.keys].values
+        row,rows = tag.members(obj.index)
+        size = np.bincount(row,minlength=len(tag.keys))
+        X = np.ascontiguousarray(obj.values.T,dtype=dtype)
+        n = X.shape[1]
+        rng = np.random.default_rng(seed)
+        kmax = min(int(np.max(size,initial=0)),n)
+        draw = None
+        stat = np.full(es.shape + (3,),np.nan) # NES,p value,adjusted p value
+        for j in range(X.shape[0]):
+            val = -np.sort(-X[j])[None,:]
+            weight = self.__algorithm.weight(val,alpha)[0].astype(dtype)
+            # the weights are included in the key because they depend on the sample if alpha > 0
+            # the first k drawn positions depend only on (seed,n), so the nulls are shared between libraries
+            digest = hashlib.sha1(weight.tobytes()).hexdigest()
+            key = lambda k: (n,int(k),alpha,self.__method.get_name(),n_perm,digest,seed)
+            null = dict()
+            todo = []
+            for k in np.unique(size):
+                v = self.__cache.get(key(k))
+                if v is None:
+                    todo.append(k)
+                else:
+                    null[k] = v
+            if len(todo) > 0:
+                if draw is None:
+                    draw = _draw_positions(rng,n,kmax,n_perm)
+                for k,v in _null_score(draw,todo,weight,self.__method.score).items():
+                    self.__cache.put(key(k),v)
+                    null[k] = v
+            for k,v in null.items():
+                idx = np.where(size==k)[0]
+                v = np.sort(v)
+                with np.errstate(divide="ignore",invalid="ignore"):
+                    stat[idx,j,0] = es[idx,j]/np.mean(v)
+                stat[idx,j,1] = (1 + len(v) - np.searchsorted(v,es[idx,j],side="left"))/(1 + len(v))
+            valid = ~np.isnan(es[:,j]) & ~np.isnan(stat[:,j,1])
+            stat[~valid,j,1] = np.nan
+            if np.any(valid):
+                stat[valid,j,2] = multitest.multipletests(stat[valid,j,1],alpha=0.05,method=correction)[1]
+        col = pd.MultiIndex.from_product([list(obj.columns),["ES","NES","p value","adjusted p value"]])
+        val = np.concatenate([es[:,:,None],stat],axis=2).reshape(len(tag.keys),-1)
+        self.res = pd.DataFrame(val,index=tag.keys,columns=col)
+        if self.res.shape[1] > 0:
+            self.res = self.res.sort_values(by=self.res.columns[0],ascending=False)
+        return self.res
+
+
+    def details(self,obj,ref,alpha,terms:list=None,**kwargs):
+        """
+        running sums of the requested terms computed on demand
+        nothing is stored in the calculator
+
+        Parameters
+        ----------
+        obj: series or dataframe
+            interest data prepared as for calc
+
+        ref: dict or RefMatrix
+            reference sets
+
+        alpha: float, (0,1]
+            indicate weight of center
+
+        terms: list
+            the terms whose running sums are computed, all the terms if None
+            not used in the focused mode of ssGSEA, where fterm is indicated instead
+
+        Returns (es,loc,keys)
+        ----------
+        es: 2d array
+            enrichment scores of each location (feature x tag/sample)
+
+        loc: 2d array
+            location of tag-positive elements in data (tag/sample x feature)
+
+        keys: list
+            tag names or sample names for output
+
+        """
+        obj,tag = self.__process.do(obj,ref,**kwargs)
+        if (terms is not None) and ("fterm" not in kwargs):
+            tag = _compile(tag).subset(list(terms))
+        es,keys,loc = self.__algorithm.calc(obj,tag,alpha)
+        return es,loc,keys
+
+
+    def get_leading_edge(self):
+        """
+        leading edge members of the last calc_matrix(leading_edge=True)
+
+        Returns
+        ----------
+        dict of {sample name:RefMatrix}
+            members are the rows of the data (indices) compiled for each tag (indptr),
+            RefMatrix.to_dict() decodes them into sets
+
+        """
+        return self.leading
+
+
+    def set_keep_details(self,keep_details:bool=True):
+        """
+        whether es and loc of calc(curve=True) are stored for get_details
+        if False, nothing beyond the result is retained and details() recomputes them
+
+        """
+        self.__keep = keep_details
+        if not keep_details:
+            self.es = np.array([[],[]])
+            self.loc = np.array([[],[]])
+
+
+    def set_cache(self,maxsize:int=4096,spill:str=None):
+        """
+        set the cache of null distributions for permutation test
+
+        Parameters
+        ----------
+        maxsize: int
+            the number of nulls kept in memory
+
+        spill: str
+            a directory where evicted nulls are saved as .npy
+
+        """
+        self.__cache = NullCache(maxsize=maxsize,spill=spill)
+
+
+    def get_cache(self):
+        """ get the cache of null distributions """
+        return self.__cache
+
+
+    def get_details(self):
+        """
+        obtain detailed data for visualization
+
+        Returns (es,loc,keys,res)
+        ----------
+        es: 2d array
+            enrichment scores of each location (feature x tag/sample)
+
+        loc: 2d array
+            location of tag-positive elements in data (tag/sample x feature)
+
+        keys: list
+            tag names or sample names for output
+
+        es and loc are empty when keep_details is False, use details() instead
+
+        """
+        return self.es,self.loc,self.keys,self.res
+
+
+    def to_gsea(self):
+        self.__process.to_gsea()
+        self.__algorithm.to_gsea()
+
+    def to_ssgsea(self):
+        self.__process.to_ssgsea()
+        self.__algorithm.to_ssgsea()
+
+    def to_expssgsea(self):
+        self.__process.to_expssgsea()
+        self.__algorithm.to_expssgsea()
+
+    def to_kcdfgsva(self):
+        """ GSVA with the kernel CDF statistics, scored by the max difference """
+        self.__process.to_expssgsea()
+        self.__algorithm.to_gsva()
+        self.__method.to_gsva_diff()
+
+    def to_standard(self):
+        self.__method.to_standard()
+
+    def to_kuiper(self):
+        self.__method.to_kuiper()
+
+    def to_gsva(self):
+        self.__method.to_gsva()
+
+
+### Common Functions ###
+def _compile(tag):
+    """ compile a dict of tag sets into RefMatrix if not yet """
+    if isinstance(tag,RefMatrix):
+        return tag
+    return RefMatrix(tag)
+
+
+def _check_dtype(dtype):
+    """
+    dtype of the scoring, float64 or float32
+    with float32, the cumulative weights keep about 7 digits,
+    while values closer than the float32 resolution can swap their ranks
+    and each swap moves a score by about 1/(feature No.)
+    the tests assert |float32 - float64| <= 2/(feature No.) for all the methods,
+    e.g. 1e-4 with 20000 features
+
+    """
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float64,np.float32):
+        raise ValueError("!! Wrong dtype: choose float64 or float32 !!")
+    return dtype
+
+
+def _to_frame(score,names):
+    """ convert enrichment scores into a sorted dataframe """
+    return pd.DataFrame(score,index=names,columns=["ES"]).sort_values(by="ES",ascending=False)
+
+
+def _running(loc,weight):
+    """
+    running enrichment score of a tag along the ranking
+
+    Parameters
+    ----------
+    loc: 1d array
+        location of the members in the ranking
+
+    weight: 1d array
+        weight of each position in the ranking
+
+    """
+    posi = np.cumsum(weight*loc)
+    nega = np.cumsum(~loc)
+    with np.errstate(divide="ignore",invalid="ignore"):
+        return posi/posi[-1] - nega/nega[-1]
+
+
+def _leading_edge(es,loc):
+    """
+    members in the leading edge, before the peak of a positive running sum
+    or after the peak of a negative one
+    
+    """
+    x = np.arange(len(es))
+    peak = np.argmax(np.abs(es))
+    if es[peak] >= 0:
+        return loc & (x <= peak)
+    else:
+        return loc & (x >= peak)
+
+
+def _matrix_extremum(data,tag,fxn,block:int=None,n_jobs:int=1,dtype=np.float64,
+                     chunk_size:int=None,memory_limit:int=None,leading_edge:bool=False,score=None):
+    """
+    extrema of the running sum of all tags for all samples
+    the whole matrix is ranked by one argsort and hits are gathered through the ranks
+    
+    Parameters
+    ----------
+    data: dataframe
+        feature x sample dataframe
+
+    tag: RefMatrix
+        compiled reference
+
+    fxn: function
+        returns weight of each position from the sorted values (sample x feature)
+        should be picklable when n_jobs is not 1
+
+    block: int
+        the number of samples scored at once, determined from the hit No. if None
+
+    n_jobs: int
+        the number of processes sharing the blocks, -1 means all the cpus
+        the matrix and the reference are shared via shared memory, not copied
+
+    dtype: numpy dtype
+        float64 or float32 for the whole computation
+
+    chunk_size: int
+        the number of tags scored at once, all the tags if None
+
+    memory_limit: int
+        approximate upper limit (bytes) of the working arrays of a block
+        tags and samples are split so that each block fits in it
+        the ranking of a sample block is shared by its tag chunks
+
+    leading_edge: boolean
+        whether the leading edge members are extracted in the same pass
+
+    score: function
+        returns enrichment scores from the maximum and the minimum
+        if given, each block is scored into one preallocated array
+        and (score,keys) is returned instead of (maxi,mini,keys)
+
+    Returns (maxi,mini,keys) or (maxi,mini,keys,lead) if leading_edge
+    ----------
+    maxi,mini: 2d array
+        maximum and minimum of the running sum (tag x sample)
+
+    keys: list
+        tag names
+
+    lead: list
+        (indptr,indices) of each sample, CSR of the leading edge members of each tag
+        given as the row No. of data
+
+    """
+    X = np.ascontiguousarray(data.values.T,dtype=dtype)
+    m = X.shape[0]
+    n_tag = len(tag.keys)
+    row,rows = tag.members(data.index)
+    per_hit = 2*(16 + 3*X.itemsize) # bytes for a hit in _hit_extremum including padding
+    limit = None if memory_limit is None else max(1,memory_limit//per_hit)
+    chunks = _tag_chunks(row,n_tag,chunk_size,limit)
+    n_hit = max([h1 - h0 for _,_,h0,h1 in chunks] + [0])
+    if block is None:
+        if memory_limit is None:
+            block = _block_size(n_hit)*(8//X.itemsize) # float32 doubles the block
+        else:
+            block = max(1,memory_limit//(X.shape[1]*(16 + 2*X.itemsize) + n_hit*per_hit))
+    out = [np.zeros((n_tag,m),dtype=dtype) for i in range(1 if score else 2)]
+    arrays = {"X":X,"row":row,"rows":rows}
+    lead = [None]*m
+    n_jobs = get_n_jobs(n_jobs)
+    if (n_jobs==1) or (m < 2):
+        shards = [(start,min(start + block,m)) for start in range(0,m,block)]
+        res = ((v,_shard_extremum(arrays,v,chunks,fxn,leading_edge,score)) for v in shards)
+    else:
+        block = max(1,min(block,-(-m//n_jobs))) # at least one block for each process
+        shards = [(start,min(start + block,m)) for start in range(0,m,block)]
+        res = map_shared(_shard_extremum,arrays,shards,min(n_jobs,len(shards)),
+                         args=(chunks,fxn,leading_edge,score))
+    for (start,stop),v in res:
+        for o,w in zip(out,v):
+            o[:,start:stop] = w
+        if leading_edge:
+            lead[start:stop] = v[-1]
+    if leading_edge:
+        return tuple(out) + (tag.keys,lead)
+    return tuple(out) + (tag.keys,)
+
+
+def _tag_chunks(row,n_tag,chunk_size:int=None,limit:int=None):
+    """
+    split tags into consecutive chunks scored one after another
+
+    Parameters
+    ----------
+    row: 1d array
+        tag No. of each hit, sorted
+
+    n_tag: int
+        the number of tags
+
+    chunk_size: int
+        the maximum number of tags in a chunk
+
+    limit: int
+        the maximum number of hits in a chunk, a larger tag forms a chunk by itself
+
+    Returns
+    ----------
+    a list of (first tag,last tag + 1,first hit,last hit + 1)
+
+    """
+    start = np.searchsorted(row,np.arange(n_tag + 1))
+    bounds = [0]
+    while bounds[-1] < n_tag:
+        t0 = bounds[-1]
+        t1 = n_tag if chunk_size is None else min(t0 + max(chunk_size,1),n_tag)
+        if limit is not None:
+            t1 = min(t1,max(t0 + 1,np.searchsorted(start,start[t0] + limit,side="right") - 1))
+        bounds.append(int(t1))
+    if n_tag==0:
+        bounds.append(0)
+    return [(t0,t1,start[t0],start[t1]) for t0,t1 in zip(bounds[:-1],bounds[1:])]
+
+
+def _block_extremum(X,row,rows,chunks,fxn,leading_edge:bool=False):
+    """
+    extrema of the running sum of all tags for a block of samples
+
+    Parameters
+    ----------
+    X: 2d array
+        sample x feature array, its dtype is kept through the computation
+
+    row,rows: 1d array
+        tag No. and feature No. of the members found in the data
+
+    chunks: list
+        chunks of tags given by _tag_chunks, scored one after another
+
+    leading_edge: boolean
+        whether the leading edge members are extracted from the peak positions
+
+    Returns (maxi,mini) or (maxi,mini,lead) if leading_edge
+    ----------
+    maxi,mini: 2d array
+        tag x sample array
+
+    lead: list
+        (indptr,indices) of the leading edge of each sample
+
+    """
+    order,rank = _rank_data(X)
+    weight = fxn(np.take_along_axis(X,order,axis=1))
+    m = X.shape[0]
+    n_tag = chunks[-1][1]
+    maxi = np.zeros((n_tag,m),dtype=X.dtype)
+    mini = np.zeros((n_tag,m),dtype=X.dtype)
+    size = [[] for i in range(m)]
+    member = [[] for i in range(m)]
+    for t0,t1,h0,h1 in chunks:
+        r = row[h0:h1] - t0
+        pos = rank[:,rows[h0:h1]]
+        if not leading_edge:
+            hi,lo = _hit_extremum(r,pos,weight,t1 - t0,dtype=X.dtype)
+        else:
+            hi,lo,ahi,alo = _hit_extremum(r,pos,weight,t1 - t0,dtype=X.dtype,arg=True)
+            # the peak of |es| is the maximum or the minimum, the first one if tied
+            posi = (np.abs(hi) > np.abs(lo)) | ((np.abs(hi)==np.abs(lo)) & (ahi <= alo))
+            peak = np.where(posi,ahi,alo)[:,r]
+            edge = np.where(posi[:,r],pos <= peak,pos >= peak)
+            for i in range(m):
+                size[i].append(np.bincount(r[edge[i]],minlength=t1 - t0))
+                member[i].append(rows[h0:h1][edge[i]])
+        maxi[t0:t1] = hi.T
+        mini[t0:t1] = lo.T
+    if leading_edge:
+        lead = [(np.r_[0,np.cumsum(np.concatenate(v))],np.concatenate(w).astype(np.int32))
+                for v,w in zip(size,member)]
+        return maxi,mini,lead
+    return maxi,mini
+
+
+def _shard_extremum(arrays,shard,chunks,fxn,leading_edge:bool=False,score=None):
+    """
+    score the samples of a shard, also the worker of the process pool
+    Returns the result of _block_extremum where (maxi,mini) is replaced by score if given
+
+    """
+    start,stop = shard
+    res = _block_extremum(arrays["X"][start:stop],arrays["row"],arrays["rows"],chunks,fxn,leading_edge)
+    if score is not None:
+        res = (score(res[0],res[1]),) + res[2:]
+    return res
+
+
+def _rank_codes(data,rows):
+    """
+    rank position of the indicated features in each sample by one argsort
+    replaces sorting each column and collecting the feature names
+
+    Parameters
+    ----------
+    data: series or dataframe
+        a series or feature x sample dataframe (not sorted)
+
+    rows: 1d array
+        row No. of the features of interest in data,
+        e.g. the members of RefMatrix aligned to data by members()
+
+    Returns
+    ----------
+    pos: 2d array
+        int32 position codes of the features in the descending order (sample x features)
+
+    """
+    X = np.asarray(data.values,dtype=float)
+    if X.ndim==1:
+        X = X[:,None]
+    order,rank = _rank_data(np.ascontiguousarray(X.T))
+    return rank[:,rows]
+
+
+def _rank_data(X):
+    """
+    sort each row of a matrix in descending order
+    ties are kept in the order of features, so that the ranking is reproducible
+
+    Parameters
+    ----------
+    X: 2d array
+        sample x feature array
+
+    Returns (order,rank)
+    ----------
+    order: 2d array
+        feature No. in the descending order
+
+    rank: 2d array
+        position of each feature in the descending order (int32)
+
+    """
+    order = np.argsort(-X,axis=1,kind="stable")
+    rank = np.empty(X.shape,dtype=np.int32)
+    np.put_along_axis(rank,order,np.arange(X.shape[1],dtype=np.int32)[None,:],axis=1)
+    return order,rank
+
+
+def _sketch_extremum(data,tag,fxn,bins:int=64,size:int=1 << 22):
+    """
+    approximate extrema of the running sum of all tags for all samples from rank bins
+    each sample is cut into bins by quantile breakpoints of a fixed subsample of the features,
+    and the exact bin of each feature is obtained by searchsorted instead of sorting
+    the running sum is evaluated at the bin boundaries from the hit counts of each bin,
+    where a hit takes the mean weight of the positions in its bin
+
+    bounds of the absolute errors (P: hit part, N: miss part of the running sum)
+    - the weight of a hit differs from the mean at most by the spread w_b of its bin,
+      so P at each boundary is off by 2D/(C - D) at most (D = sum of w_b of the hits, C = total weight)
+    - between the boundaries, the maximum can grow by the hit weight of one bin over C
+      and the minimum can fall by the misses of one bin over the miss No.
+
+    Parameters
+    ----------
+    data: dataframe
+        feature x sample dataframe (not sorted)
+
+    tag: RefMatrix
+        reference sets
+
+    fxn: function
+        weight of each position in the ranking, shared by the samples
+
+    bins: int
+        the number of rank bins
+
+    size: int
+        approximate number of elements of the hit count array processed at once
+
+    Returns (maxi,mini,err_max,err_min)
+    ----------
+        2d arrays (tag x sample)
+
+    """
+    X = np.asarray(data.values,dtype=float)
+    n,n_sample = X.shape
+    n_tag = len(tag.keys)
+    row,rows = tag.members(data.index)
+    bins = max(1,min(int(bins),n))
+    w = np.asarray(fxn(np.zeros((1,n))),dtype=float)[0]
+    cw = np.r_[0,np.cumsum(w)]
+    with np.errstate(divide="ignore"):
+        inv_nh = (1/(n - np.bincount(row,minlength=n_tag))[None,:]).astype(np.float32)
+    head = (row*bins).astype(np.int32) # offset of the hit counts of each tag
+    sub = np.sort(np.random.default_rng(0).choice(n,min(n,8*bins),replace=False))
+    res = [np.zeros((n_tag,n_sample)) for i in range(4)]
+    step = max(1,size//max(n_tag*bins,n))
+    for s in range(0,n_sample,step):
+        x = X[:,s:s + step]
+        S = x.shape[1]
+        ### bin code of each feature in the descending order
+        brk = np.sort(x[sub],axis=0)[(np.arange(1,bins)*len(sub))//bins]
+        code = np.empty((S,n),dtype=np.int32)
+        for j in range(S):
+            code[j] = bins - 1 - np.searchsorted(brk[:,j],x[:,j],side="right")
+        offset = (np.arange(S)*bins)[:,None]
+        total = np.bincount((offset + code).ravel(),minlength=S*bins).reshape(S,bins)
+        end = np.cumsum(total,axis=1)
+        start = end - total
+        ### mean and spread of the weights in each bin
+        mean = (cw[end] - cw[start])/np.maximum(total,1)
+        spread = np.zeros((S,bins))
+        for j in range(S):
+            first = np.minimum(start[j],n - 1)
+            spread[j] = np.maximum.reduceat(w,first) - np.minimum.reduceat(w,first)
+        ### running sum at the bin boundaries, float32 is enough for the sketch
+        hit = np.empty((S,n_tag,bins),dtype=np.float32)
+        for j in range(S):
+            hit[j] = np.bincount(head + code[j,rows],minlength=n_tag*bins).reshape(n_tag,bins)
+        C = np.cumsum(hit*mean[:,None,:].astype(np.float32),axis=2)
+        miss = total[:,None,:].astype(np.float32) - hit
+        with np.errstate(divide="ignore",invalid="ignore"):
+            es = C*(1/C[:,:,-1:]) - np.cumsum(miss,axis=2)*inv_nh[:,:,None]
+            dev = np.einsum("stb,sb->st",hit,spread.astype(np.float32))
+            low = C[:,:,-1] - dev
+            eta = np.where(low > 0,2*dev/low,1)
+            gain = np.where(low > 0,np.max(hit*(mean + spread)[:,None,:].astype(np.float32),axis=2)/low,1)
+            drop = np.max(miss,axis=2)*inv_nh
+        res[0][:,s:s + S] = np.maximum(np.max(es,axis=2),0).T
+        res[1][:,s:s + S] = np.minimum(np.min(es,axis=2),0).T
+        res[2][:,s:s + S] = np.minimum(eta + gain,1).T
+        res[3][:,s:s + S] = np.minimum(eta + drop,1).T
+    return tuple(res)
+
+
+def _kernel_cdf(X,bins:int=512,size:int=1 << 22):
+    """
+    log odds of the Gaussian kernel CDF of each feature across the samples (GSVA)
+    F(x_j) = mean_k Phi((x_j - x_k)/h), h = sd/4, and log(F/(1 - F)) is returned
+    features without variance are 0
+
+    Parameters
+    ----------
+    X: 2d array
+        feature x sample array
+
+    bins: int
+        the number of grid points for each feature, the exact estimate if None
+        the samples are linearly binned on the grid between the minimum and the maximum,
+        the kernel is convolved by FFT and F is interpolated at each sample,
+        the error is ~((max - min)/(bins x h))^2
+
+    size: int
+        approximate number of elements processed at once
+
+    """
+    X = np.asarray(X,dtype=np.float64)
+    n = X.shape[1]
+    res = np.zeros(X.shape)
+    if n < 2:
+        return res
+    sd = np.std(X,axis=1,ddof=1)
+    valid = np.flatnonzero(sd > 0)
+    h = sd/4
+    if bins is None:
+        step = max(1,size//(n*n))
+        for s in range(0,len(valid),step):
+            idx = valid[s:s + step]
+            x = X[idx]
+            F = np.mean(ndtr((x[:,:,None] - x[:,None,:])/h[idx,None,None]),axis=2)
+            res[idx] = np.log(F/(1 - F))
+        return res
+    bins = max(int(bins),2)
+    L = 1 << int(np.ceil(np.log2(3*bins - 2))) # linear convolution without wrapping
+    step = max(1,size//L)
+    lag = np.arange(-(bins - 1),bins)
+    for s in range(0,len(valid),step):
+        idx = valid[s:s + step]
+        x = X[idx]
+        b = len(idx)
+        lo = np.min(x,axis=1,keepdims=True)
+        width = (np.max(x,axis=1,keepdims=True) - lo)/(bins - 1)
+        grid = (x - lo)/width
+        t0 = np.clip(np.floor(grid).astype(np.int64),0,bins - 2)
+        frac = grid - t0
+        code = (np.arange(b)*bins)[:,None] + t0
+        count = np.bincount(code.ravel(),weights=(1 - frac).ravel(),minlength=b*bins)
+        count += np.bincount(code.ravel() + 1,weights=frac.ravel(),minlength=b*bins)
+        kernel = ndtr(lag[None,:]*(width/h[idx,None]))
+        conv = np.fft.irfft(np.fft.rfft(count.reshape(b,bins),L,axis=1)*np.fft.rfft(kernel,L,axis=1),
+                            L,axis=1)[:,bins - 1:2*bins - 1]/n
+        F = np.take_along_axis(conv,t0,axis=1)*(1 - frac) + np.take_along_axis(conv,t0 + 1,axis=1)*frac
+        F = np.clip(F,0.5/n,1 - 0.5/n) # F includes Phi(0)/n of the sample itself
+        res[idx] = np.log(F/(1 - F))
+    return res
+
+
+def _block_size(n_hit,size:int=1 << 22):
+    """ the number of samples processed at once to keep arrays around the given size """
+    return max(1,size//max(n_hit,1))
+
+
+def _draw_positions(rng,n,k,n_perm,chunk:int=256):
+    """
+    draw random positions for permutation
+    each row is a random ordered k-subset of range(n), so that its first j elements
+    are also a random j-subset for any j <= k
+    the positions are ordered by random keys drawn independently of k,
+    so that the first j elements are the same for any k >= j with the same rng
+
+    """
+    res = np.zeros((n_perm,k),dtype=np.int64)
+    for start in range(0,n_perm,chunk):
+        s = slice(start,min(start + chunk,n_perm))
+        key = rng.random((s.stop - s.start,n))
+        if k==0:
+            continue
+        temp = np.argpartition(key,k - 1,axis=1)[:,:k]
+        order = np.argsort(np.take_along_axis(key,temp,axis=1),axis=1,kind="stable")
+        res[s] = np.take_along_axis(temp,order,axis=1)
+    return res
+
+
+def _null_score(draw,size,weight,fxn,limit:int=1 << 22):
+    """
+    score the null distribution of each set size
+
+    Parameters
+    ----------
+    draw: 2d array
+        random positions (permutation x max size) given by _draw_positions
+
+    size: 1d array
+        set sizes to be scored
+
+    weight: 1d array
+        weight of each position in the ranking
+
+    fxn: function
+        returns enrichment scores from the maximum and the minimum
+
+    Returns
+    ----------
+    dict of {size:null scores (permutation,)}
+
+    """
+    n_perm = draw.shape[0]
+    size = [k for k in size if k > 0]
+    res = dict()
+    while len(size) > 0:
+        # sizes are stacked as rows of one call while the hit No. is below the limit
+        group = [size.pop(0)]
+        while (len(size) > 0) and (n_perm*(sum(group) + size[0]) <= limit):
+            group.append(size.pop(0))
+        row = np.concatenate([np.repeat(np.arange(n_perm) + i*n_perm,k) for i,k in enumerate(group)])
+        pos = np.concatenate([draw[:,:k].ravel() for k in group])
+        maxi,mini = _hit_extremum(row,pos,weight,n_perm*len(group))
+        score = fxn(maxi,mini)
+        for i,k in enumerate(group):
+            res[k] = score[i*n_perm:(i + 1)*n_perm]
+    return res
+
+
+def _hit_extremum(row,pos,weight,n_row,dtype=None,arg:bool=False):
+    """
+    maximum and minimum of the running enrichment scores computed only at hit positions
+    the running sum is piecewise linear between hits, so its maximum is just after a hit
+    and its minimum is just before a hit (or at the end, where the running sum is 0),
+    which needs O(set size) instead of O(feature No.) for each tag
+    
+    Parameters
+    ----------
+    row: 1d array
+        tag No. (or sample No.) of each hit
+
+    pos: 1d or 2d array
+        position of each hit in the ranking (sample x hit for 2d)
+
+    weight: 1d or 2d array
+        weight of each position in the ranking (sample x feature for 2d),
+        a single row is shared by all the samples
+
+    n_row: int
+        the number of tags (or samples)
+
+    dtype: numpy dtype
+        dtype of the whole computation, that of weight (float64 if not float) if None
+
+    arg: boolean
+        whether the positions of the maximum and the minimum are also returned
+
+    Returns (maxi,mini) or (maxi,mini,amax,amin) if arg
+    ----------
+    maxi,mini: 1d or 2d array
+        maximum and minimum of each row (sample x row for 2d)
+
+    amax,amin: 1d or 2d array
+        position in the ranking where the running sum takes the maximum and the minimum
+        (the first one), the end of the ranking when it is the end value 0
+
+    """
+    vector = (np.ndim(pos)==1)
+    pos = np.atleast_2d(pos)
+    weight = np.atleast_2d(weight)
+    if dtype is None:
+        dtype = weight.dtype if np.issubdtype(weight.dtype,np.floating) else np.float64
+    weight = weight.astype(dtype,copy=False)
+    m = pos.shape[0]
+    n = weight.shape[1]
+    weight = np.hstack([weight,np.zeros((weight.shape[0],1),dtype=weight.dtype)]).ravel()
+    offset = (np.arange(m)*(n + 1))[:,None,None] if len(weight) > n + 1 else 0
+    order = np.argsort(row,kind="stable")
+    row = row[order]
+    pos = np.hstack([pos[:,order],np.zeros((m,1),dtype=pos.dtype)]) # a dummy for padding
+    size = np.bincount(row,minlength=n_row)
+    start = np.cumsum(size) - size
+    maxi = np.zeros((m,n_row),dtype=weight.dtype)
+    mini = np.zeros((m,n_row),dtype=weight.dtype)
+    amax = np.full((m,n_row),n - 1,dtype=np.int64)
+    amin = np.full((m,n_row),n - 1,dtype=np.int64)
+    # tags are bucketed by size so that padding is less than 2 fold
+    bucket = np.ceil(np.log2(np.maximum(size,1))).astype(int)
+    with np.errstate(divide="ignore",invalid="ignore"):
+        for b in np.unique(bucket):
+            r = np.where(bucket==b)[0]
+            k = size[r][:,None]
+            t = np.arange(1 << b)
+            valid = t < k
+            # padded hits are placed after the end with the running sum kept at 0
+            p = pos[:,np.where(valid,start[r][:,None] + t,0)]
+            np.copyto(p,n - k + t,where=~valid)
+            p.sort(axis=-1)
+            w = np.take(weight,np.minimum(p,n) + offset)
+            cw = np.cumsum(w,axis=-1)
+            inv = 1/cw[:,:,-1:]
+            p -= t
+            nega = p.astype(weight.dtype)
+            nega *= 1/(n - k)
+            last = cw[:,:,-1]*inv[:,:,0] - (n - k[:,0])/(n - k[:,0])
+            after = cw
+            after *= inv
+            after -= nega
+            w *= inv
+            before = np.subtract(after,w,out=w)
+            hi = np.max(after,axis=-1)
+            lo = np.min(before,axis=-1)
+            maxi[:,r] = np.maximum(hi,last)
+            mini[:,r] = np.minimum(lo,last)
+            if arg:
+                # p + t is the position of each hit, the value before a hit is at the previous one
+                j = np.argmax(after,axis=-1)[:,:,None]
+                top = np.take_along_axis(p,j,axis=-1)[:,:,0] + j[:,:,0]
+                amax[:,r] = np.where(hi >= last,np.minimum(top,n - 1),n - 1)
+                j = np.argmin(before,axis=-1)[:,:,None]
+                bottom = np.take_along_axis(p,j,axis=-1)[:,:,0] + j[:,:,0] - 1
+                amin[:,r] = np.where(lo <= last,np.clip(bottom,0,n - 1),n - 1)
+    if arg:
+        if vector:
+            return maxi[0],mini[0],amax[0],amin[0]
+        return maxi,mini,amax,amin
+    if vector:
+        return maxi[0],mini[0]
+    return maxi,mini
+
+
+def _accumulative(X,axis=0):
+    """
+    calculate accumulative sum
+    
+    Parameters
+    ----------
+    axis: 0 or 1
+        determine sum direction
+    
+    """
+    if axis==1:
+        X = X.T
+    x = np.zeros(X.shape[1])
+    res = []
+    ap = res.append
+    for v in X:
+        x += v
+        ap(x.copy())
+    res = np.array(res)
+    return res
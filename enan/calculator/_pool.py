@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:12:41 2026
+
+process pool sharing arrays via shared memory
+
+@author: tadahaya
+"""
+import numpy as np
+import os
+from multiprocessing import get_context
+from multiprocessing import shared_memory
+
+_SHARED = dict() # arrays attached in each worker
+
+class SharedArrays():
+    """
+    numpy arrays placed in shared memory once
+    workers attach them by name, so that they are not pickled
+
+    """
+    def __init__(self,arrays:dict):
+        self.spec = dict()
+        self.__shm = []
+        for k,v in arrays.items():
+            v = np.ascontiguousarray(v)
+            shm = shared_memory.SharedMemory(create=True,size=max(v.nbytes,1))
+            self.__shm.append(shm)
+            np.ndarray(v.shape,dtype=v.dtype,buffer=shm.buf)[...] = v
+            self.spec[k] = (shm.name,v.shape,v.dtype.str)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self,*args):
+        self.close()
+
+
+    def close(self):
+        """ release shared memory """
+        for shm in self.__shm:
+            shm.close()
+            shm.unlink()
+        self.__shm = []
+
+
+def get_n_jobs(n_jobs:int=-1):
+    """ the number of processes, -1 means all the cpus """
+    if (n_jobs is None) or (n_jobs < 1):
+        return os.cpu_count() or 1
+    return n_jobs
+
+
+def map_shared(fxn,arrays:dict,shards:list,n_jobs:int=-1,args:tuple=()):
+    """
+    apply fxn(arrays,shard,*args) to each shard in a process pool
+
+    Parameters
+    ----------
+    fxn: function
+        a module level function receiving a dict of the shared arrays and a shard
+
+    arrays: dict
+        numpy arrays to be shared by the workers zero-copy
+
+    shards: list
+        arguments indicating the part of the arrays processed by each task
+
+    n_jobs: int
+        the number of processes, -1 means all the cpus
+
+    args: tuple
+        other arguments of fxn, pickled once for each worker
+
+    Returns
+    ----------
+    a list of (shard,result)
+
+    """
+    res = []
+    ap = res.append
+    with SharedArrays(arrays) as shared:
+        with get_context().Pool(get_n_jobs(n_jobs),initializer=_init,
+                                initargs=(shared.spec,fxn,args)) as pool:
+            for v in pool.imap_unordered(_run,shards):
+                ap(v)
+    return res
+
+
+def _init(spec,fxn,args):
+    """ attach the shared arrays in a worker """
+    _SHARED.clear()
+    for k,(name,shape,dtype) in spec.items():
+        shm = shared_memory.SharedMemory(name=name)
+        _SHARED[k] = (shm,np.ndarray(shape,dtype=dtype,buffer=shm.buf))
+    _SHARED["__fxn__"] = (fxn,args)
+
+
+def _run(shard):
+    """ process a shard in a worker """
+    fxn,args = _SHARED["__fxn__"]
+    arrays = {k:v[1] for k,v in _SHARED.items() if k!="__fxn__"}
+    return shard,fxn(arrays,shard,*args)
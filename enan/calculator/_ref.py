@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:02:15 2026
+
+reference sets compiled into an integer-coded membership,
+shared by the GSEA, FET and BT calculators
+
+@author: tadahaya
+"""
+import pandas as pd
+import numpy as np
+from itertools import chain
+import hashlib
+import statsmodels.stats.multitest as multitest
+from scipy import sparse
+
+### reference ###
+class RefMatrix():
+    """
+    reference sets compiled into an integer-coded sparse (CSR) membership matrix
+    over the feature universe (union of all the members)
+
+    keys: list
+        tag names
+
+    universe: Index
+        interned features, the code of each feature is its position
+
+    indptr,indices: 1d array
+        CSR membership, members of the i-th tag are universe[indices[indptr[i]:indptr[i + 1]]]
+
+    tag: 1d array
+        tag No. of each entry of indices
+
+    """
+    def __init__(self,ref:dict=None):
+        self.keys = []
+        self.universe = pd.Index([])
+        self.indptr = np.zeros(1,dtype=np.int64)
+        self.indices = np.zeros(0,dtype=np.int32)
+        self.tag = np.zeros(0,dtype=np.int32)
+        self.__index = None
+        self.__rows = (np.zeros(1,dtype=np.int64),np.zeros(0,dtype=np.int64))
+        self.__digest = None
+        self.__keyindex = None
+        self.__inverted = None
+        if ref is not None:
+            self.fit(ref)
+
+
+    def fit(self,ref:dict):
+        """
+        compile a dict of sets like {"XXXX":{"aa","bb"},"YYYY":{"cc","dd","ee"},...}
+        
+        """
+        self.keys = list(ref.keys())
+        values = [list(v) for v in ref.values()]
+        self.universe = pd.Index(list(dict.fromkeys(chain.from_iterable(values))))
+        size = np.array([len(v) for v in values],dtype=np.int64)
+        self.indptr = np.r_[0,np.cumsum(size)].astype(np.int64)
+        self.indices = self.universe.get_indexer(list(chain.from_iterable(values))).astype(np.int32)
+        self.tag = np.repeat(np.arange(len(self.keys),dtype=np.int32),size)
+        self.__index = None
+        self.__digest = None
+        self.__keyindex = None
+        self.__inverted = None
+        return self
+
+
+    def from_csr(self,keys:list,universe,indptr,indices):
+        """ set an already integer-coded membership """
+        self.keys = list(keys)
+        self.universe = pd.Index(universe)
+        self.indptr = np.asarray(indptr,dtype=np.int64)
+        self.indices = np.asarray(indices,dtype=np.int32)
+        self.tag = np.repeat(np.arange(len(self.keys),dtype=np.int32),np.diff(self.indptr))
+        self.__index = None
+        self.__digest = None
+        self.__keyindex = None
+        self.__inverted = None
+        return self
+
+
+    def to_dict(self):
+        """ decode into a dict of sets """
+        val = self.universe.values
+        return {k:set(val[self.indices[self.indptr[i]:self.indptr[i + 1]]]) for i,k in enumerate(self.keys)}
+
+
+    def fingerprint(self):
+        """
+        sha1 digest identifying the library, independent of the order of the members
+        the digest is cached until the library is compiled again
+        
+        """
+        if self.__digest is not None:
+            return self.__digest
+        h = hashlib.sha1()
+        val = self.universe.values
+        for i,k in enumerate(self.keys):
+            member = sorted(map(str,val[self.indices[self.indptr[i]:self.indptr[i + 1]]]))
+            h.update("\t".join([str(k)] + member).encode())
+            h.update(b"\n")
+        self.__digest = h.hexdigest()
+        return self.__digest
+
+
+    def get_sizes(self,keys:list=None):
+        """ the number of members of each tag, aligned with keys (e.g. the index of a result) if given """
+        size = np.diff(self.indptr)
+        if keys is None:
+            return size
+        idx = self.get_keys().get_indexer(keys)
+        if np.any(idx < 0):
+            raise KeyError("!! Wrong key: {} !!".format([k for k,i in zip(keys,idx) if i < 0]))
+        return size[idx]
+
+
+    def get_keys(self,tag=None):
+        """ the keys as an Index, of the given tag No. if any, cached until the library is compiled again """
+        if self.__keyindex is None:
+            self.__keyindex = pd.Index(self.keys)
+        if tag is None:
+            return self.__keyindex
+        return self.__keyindex[tag]
+
+
+    def bind(self,index):
+        """
+        rows of the index of data holding each universe feature
+        the result is cached while the same index is given
+
+        Returns (indptr,rows)
+        ----------
+        the rows holding the i-th universe feature are rows[indptr[i]:indptr[i + 1]],
+        a label repeated in index gives several rows
+
+        """
+        if (self.__index is None) or not ((index is self.__index) or index.equals(self.__index)):
+            self.__rows = _postings(self.universe,index)
+            self.__index = index
+        return self.__rows
+
+
+    def members(self,index):
+        """
+        members found in the index of data
+
+        Returns (tag,rows)
+        ----------
+        tag: 1d array
+            tag No. of each member found in index
+
+        rows: 1d array
+            row No. of each member found in index, once for each row holding it
+
+        """
+        return self.__expand(*self.bind(index))
+
+
+    def position(self,index):
+        """
+        locate the members in an ordered index of features
+
+        Parameters
+        ----------
+        index: Index
+            features sorted in the order of ranking
+
+        Returns (tag,pos)
+        ----------
+        tag: 1d array
+            tag No. of each member found in index
+
+        pos: 1d array
+            position of each member found in index, once for each position holding it
+
+        """
+        return self.__expand(*_postings(self.universe,index))
+
+
+    def __expand(self,indptr,rows):
+        """ tag No. and row No. of each member, from the rows holding each universe feature """
+        start = indptr[self.indices]
+        size = indptr[self.indices + 1] - start
+        head = np.repeat(start - np.cumsum(size) + size,size)
+        return np.repeat(self.tag,size),rows[head + np.arange(len(head))]
+
+
+    def invert(self):
+        """
+        inverted index from each universe feature to the tags including it
+        built once and cached until the library is compiled again
+
+        Returns (indptr,tag)
+        ----------
+        the tags including the i-th universe feature are tag[indptr[i]:indptr[i + 1]]
+
+        """
+        if self.__inverted is None:
+            order = np.argsort(self.indices,kind="stable")
+            count = np.bincount(self.indices,minlength=len(self.universe))
+            self.__inverted = (np.r_[0,np.cumsum(count)].astype(np.int64),self.tag[order])
+        return self.__inverted
+
+
+    def touched(self,query):
+        """
+        tags sharing members with a query set, gathered from the postings of its features
+        the work scales with the postings of the query, not with the library size
+
+        Returns (tag,code)
+        ----------
+        tag No. and universe code of each shared member, ordered by tag
+
+        """
+        indptr,posting = self.invert()
+        codes = self.universe.get_indexer(list(query))
+        codes = codes[codes >= 0]
+        size = indptr[codes + 1] - indptr[codes]
+        head = np.repeat(indptr[codes] - np.cumsum(size) + size,size)
+        tag = posting[head + np.arange(len(head))]
+        order = np.argsort(tag,kind="stable")
+        return tag[order],np.repeat(codes,size)[order]
+
+
+    def overlap(self,queries:list):
+        """
+        overlap counts between query sets and each tag by one sparse product
+        the queries and the tags are 0/1 matrices over the universe
+
+        Parameters
+        ----------
+        queries: list
+            a list of query sets
+
+        Returns (query,tag,count)
+        ----------
+        1d arrays of the pairs sharing any member, ordered by query and tag
+
+        """
+        size = np.array([len(v) for v in queries],dtype=np.int64)
+        codes = self.universe.get_indexer(list(chain.from_iterable(queries)))
+        row = np.repeat(np.arange(len(queries)),size)
+        found = codes >= 0
+        n_uni = len(self.universe)
+        Q = sparse.csr_matrix((np.ones(found.sum(),dtype=np.int32),(row[found],codes[found])),
+                              shape=(len(queries),n_uni))
+        R = sparse.csr_matrix((np.ones(len(self.indices),dtype=np.int32),(self.tag,self.indices)),
+                              shape=(len(self.keys),n_uni))
+        O = (Q @ R.T).tocsr()
+        O.eliminate_zeros()
+        O.sort_indices()
+        query = np.repeat(np.arange(len(queries)),np.diff(O.indptr))
+        return query,O.indices.astype(np.int64),O.data.astype(np.int64)
+
+
+    def subset(self,keys:list):
+        """ a RefMatrix composed of the indicated tags """
+        idx = pd.Index(self.keys).get_indexer(keys)
+        if np.any(idx < 0):
+            raise KeyError("!! Wrong key: {} !!".format([k for k,i in zip(keys,idx) if i < 0]))
+        size = self.indptr[idx + 1] - self.indptr[idx]
+        codes = np.concatenate([self.indices[self.indptr[i]:self.indptr[i + 1]] for i in idx] + [self.indices[:0]])
+        uniq,inv = np.unique(codes,return_inverse=True)
+        return RefMatrix().from_csr(keys,self.universe[uniq],np.r_[0,np.cumsum(size)],inv)
+
+
+    def location(self,index):
+        """ location of tag-positive elements in an ordered index (tag x feature) """
+        tag,pos = self.position(index)
+        loc = np.zeros((len(self.keys),len(index)),dtype=bool)
+        loc[tag,pos] = True
+        return loc
+
+
+def _postings(universe,index):
+    """
+    rows of index holding each universe feature, grouped by the feature
+    a repeated label of index gives several rows as in the original matching of labels
+
+    """
+    if index.is_unique:
+        pos = index.get_indexer(universe)
+        found = pos >= 0
+        return np.r_[0,np.cumsum(found)].astype(np.int64),pos[found].astype(np.int64)
+    code = universe.get_indexer(index)
+    rows = np.flatnonzero(code >= 0)
+    rows = rows[np.argsort(code[rows],kind="stable")]
+    count = np.bincount(code[code >= 0],minlength=len(universe))
+    return np.r_[0,np.cumsum(count)].astype(np.int64),rows.astype(np.int64)
+
+
+### query sets ###
+def _touched(obj,ref):
+    """
+    terms sharing members with obj, gathered from the inverted index of the compiled reference
+
+    Returns keys,overlap,hit,total
+    ----------
+    the terms in the order of the reference, their overlaps with obj,
+    the sizes of the overlaps and the sizes of the terms
+
+    """
+    tag,code = ref.touched(obj)
+    tag,head,hit = np.unique(tag,return_index=True,return_counts=True)
+    member = ref.universe.values[code].astype(object)
+    overlap = np.empty(len(tag),dtype=object)
+    overlap[:] = [set(v) for v in np.split(member,head[1:])] if len(tag) > 0 else []
+    keys = ref.get_keys(tag)
+    return keys,overlap,hit.astype(np.int64),ref.get_sizes()[tag]
+
+
+def _batch_input(obj,ref):
+    """ names and sets of the queries and the compiled reference """
+    if isinstance(obj,dict):
+        names = list(obj.keys())
+        queries = [set(v) for v in obj.values()]
+    else:
+        queries = [set(v) for v in obj]
+        names = list(range(len(queries)))
+    if not isinstance(ref,RefMatrix):
+        ref = RefMatrix(ref)
+    return names,queries,ref
+
+
+def _batch_table(names,keys,query,tag,pval,hit,total,correction,focus):
+    """ long-format result with the multiple tests corrected for each query """
+    col = ["query","term","p value","adjusted p value","hit No.","total No."]
+    if len(query)==0:
+        return pd.DataFrame(columns=col)
+    adj = np.zeros(len(pval))
+    bounds = np.flatnonzero(np.diff(query)) + 1
+    for idx in np.split(np.arange(len(query)),bounds):
+        adj[idx] = multitest.multipletests(pval[idx],alpha=0.05,method=correction)[1]
+    res = pd.DataFrame({"query":np.asarray(names,dtype=object)[query],"term":np.asarray(keys,dtype=object)[tag],
+                        "p value":pval,"adjusted p value":adj,"hit No.":hit,"total No.":total},columns=col)
+    order = np.lexsort((pval,query))
+    res = res.iloc[order].reset_index(drop=True)
+    if focus is not None:
+        res = res.groupby("query",sort=False).head(focus).reset_index(drop=True)
+    return res
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:20:07 2026
+
+Source class, a feature x sample matrix read by blocks of samples
+
+Analyzer o-- ColumnSource *-- Source
+
+@author: tadahaya
+"""
+import pandas as pd
+import numpy as np
+import os
+
+__all__ = ["ColumnSource"]
+
+# context class
+class ColumnSource():
+    """
+    feature x sample matrix streamed by blocks of columns (samples)
+    only a block is loaded in memory at once
+
+    Parameters
+    ----------
+    data: dataframe, 2d array or str
+        dataframe, ndarray/memmap or the path of .npy, HDF5 (.h5,.hdf5) or Parquet (.parquet)
+
+    index: list
+        feature names of the rows, necessary for an array, .npy and HDF5
+
+    columns: list
+        sample names, 0,1,2,... if None (array, .npy and HDF5)
+
+    key: str
+        name of the dataset in HDF5
+
+    """
+    def __init__(self,data,index=None,columns=None,key:str=None):
+        if isinstance(data,pd.DataFrame):
+            self.__source = FrameSource(data)
+        elif isinstance(data,np.ndarray):
+            self.__source = ArraySource(data,index,columns)
+        elif isinstance(data,str):
+            ext = os.path.splitext(data)[1].lower()
+            if ext==".npy":
+                self.__source = ArraySource(np.load(data,mmap_mode="r"),index,columns)
+            elif ext in (".h5",".hdf5"):
+                self.__source = HDF5Source(data,index,columns,key)
+            elif ext==".parquet":
+                self.__source = ParquetSource(data)
+            else:
+                raise ValueError("!! Wrong file: choose .npy, .h5, .hdf5 or .parquet !!")
+        else:
+            raise TypeError("!! data should be a dataframe, an array or a path !!")
+        self.index = self.__source.index
+        self.columns = self.__source.columns
+        self.shape = (len(self.index),len(self.columns))
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self,*args):
+        self.close()
+
+
+    def read(self,start:int,stop:int):
+        """ a feature x sample dataframe of the columns from start to stop """
+        return self.__source.read(start,stop)
+
+    def blocks(self,size:int):
+        """ yield (start,dataframe) of each block of columns """
+        for start in range(0,len(self.columns),size):
+            yield start,self.read(start,min(start + size,len(self.columns)))
+
+    def close(self):
+        """ release the file opened for reading """
+        self.__source.close()
+
+
+# concrete class
+class FrameSource():
+    def __init__(self,data):
+        self.data = data
+        self.index = data.index
+        self.columns = data.columns
+
+    def read(self,start,stop):
+        return self.data.iloc[:,start:stop]
+
+    def close(self):
+        pass
+
+
+# concrete class
+class ArraySource():
+    def __init__(self,data,index,columns):
+        if data.ndim!=2:
+            raise ValueError("!! data should be a feature x sample 2d array !!")
+        self.data = data
+        self.index,self.columns = _labels(data.shape,index,columns)
+
+    def read(self,start,stop):
+        return pd.DataFrame(np.asarray(self.data[:,start:stop]),index=self.index,
+                            columns=self.columns[start:stop])
+
+    def close(self):
+        pass
+
+
+# concrete class
+class HDF5Source():
+    def __init__(self,path,index,columns,key):
+        try:
+            import h5py
+        except ImportError:
+            raise ImportError("!! h5py is required to read HDF5 !!")
+        if key is None:
+            raise ValueError("!! Indicate key of the dataset in HDF5 !!")
+        self.file = h5py.File(path,"r")
+        try:
+            self.data = self.file[key]
+            self.index,self.columns = _labels(self.data.shape,index,columns)
+        except Exception:
+            self.file.close()
+            raise
+
+    def read(self,start,stop):
+        return pd.DataFrame(self.data[:,start:stop],index=self.index,columns=self.columns[start:stop])
+
+    def close(self):
+        self.file.close()
+
+
+# concrete class
+class ParquetSource():
+    def __init__(self,path):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("!! pyarrow is required to read Parquet !!")
+        self.data = pq.ParquetFile(path)
+        meta = self.data.schema_arrow.pandas_metadata or dict()
+        names = [v for v in meta.get("index_columns",[]) if isinstance(v,str)]
+        self.columns = pd.Index([v for v in self.data.schema_arrow.names if v not in names])
+        # feature names are restored from the pandas metadata as the index
+        self.index = self.data.read(columns=[],use_pandas_metadata=True).to_pandas().index
+
+    def read(self,start,stop):
+        res = self.data.read(columns=list(self.columns[start:stop]),use_pandas_metadata=True).to_pandas()
+        res.index = self.index
+        return res
+
+    def close(self):
+        self.data.close()
+
+
+def _labels(shape,index,columns):
+    """ check the labels of an unlabeled array """
+    if index is None:
+        raise ValueError("!! Indicate index (feature names) of the rows !!")
+    if len(index)!=shape[0]:
+        raise ValueError("!! index does not match the number of rows !!")
+    if columns is None:
+        columns = range(shape[1])
+    if len(columns)!=shape[1]:
+        raise ValueError("!! columns does not match the number of columns !!")
+    return pd.Index(index),pd.Index(columns)
@@ -1,339 +1,680 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Mon Sep 23 13:05:34 2019
-
-ssGSEA class
-
-@author: tadahaya
-"""
-import pandas as pd
-import numpy as np
-from itertools import chain
-import random
-import string
-from tqdm import tqdm
-
-from .process.processor import Processor
-from .analyzer import Analyzer
-from .data.data_control import ssGSEADataControl
-from .calculator._gsea import Calculator
-from .plot._plot import PlotSsGSEA
-
-# concrete class
-class ssGSEA(Analyzer):
-    def __init__(self):
-        self.data = ssGSEADataControl()
-        self.__process = Processor()
-        self.__calc = Calculator()
-        self.__plot = PlotSsGSEA()
-        self.__whole = set()
-        self.__ref = dict()
-        self.__obj = pd.DataFrame()
-        self.__method = ""
-        self.alpha = 0.0
-        self.__fterm = None
-        self.__mode = None
-        self.res = pd.DataFrame()
-
-
-    ### data processing ###
-    def check_ref(self,keyword:str):
-        """ check contents of reference data """
-        if len(self.__ref)==0:
-            raise ValueError("!! fit() before this process !!")
-        try:
-            temp = self.__ref[keyword]
-            print("{0}: {1}".format(keyword,temp))
-        except KeyError:
-            print("!! Wrong keyword !!")
-            hit = {v for v in self.__ref.keys() if keyword in v}
-            print("perhaps: {}".format(hit))
-
-    def vector2set(self,data,fold:float=3.0,
-                   nmin:int=None,nmax:int=None,**kwargs):
-        """
-        convert dataframe to the outlier set for reference
-
-        Parameters
-        ----------
-        data: dataframe
-            feature x sample dataframe
-
-        fold: float
-            indicates fold change determining the outliers
-
-        nmin,nmax: int
-            indicate the minimum/maximum number of each set 
-
-        """
-        return self.__process.vec2set(mtx=data,fold=fold,nmin=nmin,nmax=nmax,
-                                      two_sided=False,**kwargs)
-
-
-    ### data control ###
-    def fit(self,data:dict,keep_whole:bool=False,nmin=None):
-        """
-        set a reference data instance
-        
-        Parameters
-        ----------
-        data: dict
-            a dictionary of sets like {"XXXX":{"aa","bb"},"YYYY":{"cc","dd","ee"},...}
-
-        keep_whole: boolean
-            whether whole features is conserved when already registered
-
-        nmin: int
-            indicates the number of features necessary for each set
-
-        """
-        self.data.set_ref(data=data)
-        self.__ref = self.data.get_ref()
-        if keep_whole:
-            if len(self.__whole)==0:
-                raise ValueError("!! set_whole() or turn off keep_whole !!")
-            else:
-                self.data.adjust_ref()
-        else:
-            self.__whole = set(chain.from_iterable(self.__ref.values()))
-            self.data.set_whole(self.__whole)
-        if nmin is not None:
-            temp = self.__ref.copy()
-            for k,v in self.__ref.items():
-                if len(v) < nmin:
-                    del temp[k]
-            self.__ref = temp
-            self.data.set_ref(data=self.__ref)
-            
-    def set_whole(self,whole:set):
-        """
-        set whole features
-        
-        Parameters
-        ----------
-        whole: set
-            indicates whole features
-        
-        """
-        self.data.set_whole(whole)
-        self.__whole = self.data.get_whole()
-        if len(self.data.get_ref())!=0:
-            self.data.adjust_ref()
-
-    def get_ref(self):
-        """ get reference data instance """
-        return self.data.get_ref()
-
-    def get_obj(self):
-        """ get an object data instance """
-        return self.data.get_obj()
-
-    def get_whole(self):
-        return self.__whole
-
-
-    def get_calculator(self):
-        """ get calculater object """
-        return self.__calc
-
-
-    ### calculation ###
-    def calc(self,data,fterm=None,method:str="standard",alpha:float=0.25): # realization
-        """
-        conduct ssGSEA
-
-        Parameters
-        -------
-        data: dataframe
-            feature x sample dataframe
-
-        fterm: str or int
-            indicate the term of interest or the corresponding No.
-
-        method: str
-            indicate a method for calculating the enrichment score
-            "starndard": employed in the original paper Barbie, et al, 2009
-            "kuiper": Kuiper test statistics, good when up/down genes are mixed, tail sensitive
-            "gsva": GSVA like statistics, good when unidirection (ex. up only)
-
-        alpha: float, (0,1]
-            indicate weight of center
-            0.25 is employed in the original paper (Barbie,et al.,2009)
-
-        Returns res
-        -------
-        res: df
-            gene set enrichment score
-
-        """
-        self.__method = method
-        self.__alpha = alpha
-        self.__fterm = fterm
-        if method=="standard":
-            self.__calc.to_standard()
-            print("Standard method",flush=True)
-        elif method=="kuiper":
-            self.__calc.to_kuiper()
-            print("Kuiper method",flush=True)
-        elif method=="gsva":
-            self.__calc.to_gsva()
-            print("GSVA method",flush=True)
-        else:
-            raise ValueError("!! Wrong method: choose 'standard', 'kuiper', or 'gsva' !!")
-        self.data.set_obj(data)
-        self.__obj = self.data.get_obj()
-        temp = self.__obj.copy()
-        col = list(temp.columns)
-        if fterm is None:
-            self.__mode = "exploratory"
-            self.__calc.to_expssgsea()
-            res = []
-            ap = res.append
-            for v in tqdm(col):
-                ap(self.__calc.calc(obj=temp[v],ref=self.__ref,alpha=alpha))
-            res = pd.concat(res,axis=1,join="inner")
-            res.columns = col
-        else:
-            self.__mode = "focused"
-            self.__calc.to_ssgsea()
-            self.__fterm = fterm
-            res = self.__calc.calc(obj=temp,ref=self.__ref,alpha=alpha,fterm=fterm)
-        self.res = res
-        return res
-
-
-    def normalize_score(self, data=None):
-        """
-        normalize enrichment score with maximum value
-        Note that this method can be applied
-        only when the standard method was employed for calculation
-        
-        """
-        if self.__mode=="focused":
-            raise ValueError("!! Only applicable to the exploratory mode !!")
-        if data is None:
-            n = self.data.obj.data.shape[0] # 230317, n is obtained from the previous data
-        else:
-            n = data.shape[0] # 230317, n is obtained from the indicated data            
-        if self.res.empty:
-            raise ValueError("!! No result stored: calc() before this method !!")
-        key = list(self.__ref.keys())
-        val = list(self.__ref.values())
-        dic = dict(zip(key,[len(v) for v in val]))
-        idx = list(self.res.index)
-        t = np.array([dic[v] for v in idx])
-        if type(self.res)==type(pd.DataFrame()):
-            kmax = np.c_[1 - t/n]
-            val = self.res.values/kmax
-        else:
-            kmax = 1 - t/n
-            val = self.res.values.flatten()/kmax
-        return pd.DataFrame(val,columns=self.res.columns,index=idx)
-
-
-    ### visualization ###
-    def set_res(self,data):
-        """ set a result """
-        self.res = data
-
-
-    def plot(self,keyword:list=[],fterm:str=None,mode:str=None,**kwargs): # realization
-        """
-        visualize a result of enrichment analysis
-
-        Parameters
-        ----------
-        fterm: str
-            indicate the group of interest
-
-        mode: str
-            indicate ssGSEA mode: 'exploratory' or 'focused'
-            if None (default), plot the current result
-
-        keyword: list
-            indicate samples to be visualized
-
-        fileout: str
-            indicate the path for the output image
-
-        dpi: int
-            indicate dpi of the output image
-            
-        xlabel,ylabel: str
-            indicate the name of x and y axes
-
-        title: str
-            indicate the title of the plot
-
-        color: str
-            indicate the color of swarmplot (if sample size is less than 30)
-
-        palette: list
-            indicate color of boxplot
-
-        alpha: float
-            indicate transparency of the bars: (0,1)
-
-        size: float
-            size of the markers
-
-        fontsize: float
-            indicate the fontsize in the plot
-
-        textsize: float
-            indicate the fontsize of the texts in the bars
-
-        figsize: tuple
-            indicate the size of the plot
-
-        """
-        if mode is None: # plot the current result
-            if self.__mode=="exploratory":
-                # exploratory mode
-                if fterm is None:
-                    raise ValueError("!! Indicate fterm (focused term) !!")
-                else:
-                    data = self.res.T[fterm]
-                    self.__plot.plot(data=data,keyword=keyword,focus=fterm,**kwargs)
-            elif self.__mode=="focused":
-                # focused mode
-                self.__plot.plot(data=self.res,keyword=keyword,focus=self.__fterm,**kwargs)
-            else:
-                raise ValueError("!! Indicate mode: 'exploratory' or 'focused' !!")
-        elif mode=="exploratory": # plot a loaded result
-            # exploratory mode
-            if fterm is None:
-                raise ValueError("!! Indicate fterm (focused term) !!")
-            else:
-                data = self.res.T[fterm]
-                self.__plot.plot(data=data,keyword=keyword,focus=fterm,**kwargs)
-        elif mode=="focused": # plot a loaded result
-            # focused mode
-            if fterm is None:
-                raise ValueError("!! Indicate fterm (focused term) !!")
-            else:
-                self.__plot.plot(data=self.res,keyword=keyword,focus=fterm,**kwargs)
-        else:
-            raise ValueError("!! Wrong mode: 'exploratory' or 'focused' !!")
-
-
-    ### other ###
-    def generate_test_data(self):
-        """ generate data for test """    
-        # prepare reference
-        key = [''.join(random.choices(string.ascii_letters, k=5)) for i in range(10)]
-
-        def fxn():
-            return {random.randint(0,50) for j in range(random.randint(10,100))}
-
-        val = [fxn() for i in range(9)] + [{1,2,3,4,5,6,7}]
-        ref = dict(zip(key,val))
-
-        # prepare object
-        col = ["control_{}".format(i + 1) for i in range(5)]
-        col += ["treated_{}".format(i + 1) for i in range(5)]
-        obj = pd.DataFrame([np.random.randn(10000) for i in range(10)],index=col).T
-        print("generate test data as follows:")
-        print('    ref: dict, {"XXXX":{"aa","bb"},"YYYY":{"cc","dd","ee"},...}')
-        print('    obj: dataframe, feature x sample')
-        return ref,obj
\ No newline at end of file
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Sep 23 13:05:34 2019
+
+ssGSEA class
+
+@author: tadahaya
+"""
+import pandas as pd
+import numpy as np
+from itertools import chain
+import random
+import string
+import os
+import json
+import hashlib
+
+from .process.processor import Processor
+from .analyzer import Analyzer
+from .data.data_control import ssGSEADataControl
+from .data.source import ColumnSource
+from .calculator._gsea import Calculator
+from .calculator._ref import RefMatrix
+from .plot._plot import PlotSsGSEA
+
+# concrete class
+class ssGSEA(Analyzer):
+    def __init__(self):
+        self.data = ssGSEADataControl()
+        self.__process = Processor()
+        self.__calc = Calculator(keep_details=False) # only scores are retained
+        self.__plot = PlotSsGSEA()
+        self.__whole = set()
+        self.__ref = dict()
+        self.__compiled = RefMatrix()
+        self.__obj = pd.DataFrame()
+        self.__method = ""
+        self.alpha = 0.0
+        self.__fterm = None
+        self.__mode = None
+        self.__normalize = False
+        self.__bound = pd.DataFrame()
+        self.res = pd.DataFrame()
+
+
+    ### data processing ###
+    def check_ref(self,keyword:str):
+        """ check contents of reference data """
+        if len(self.__ref)==0:
+            raise ValueError("!! fit() before this process !!")
+        try:
+            temp = self.__ref[keyword]
+            print("{0}: {1}".format(keyword,temp))
+        except KeyError:
+            print("!! Wrong keyword !!")
+            hit = {v for v in self.__ref.keys() if keyword in v}
+            print("perhaps: {}".format(hit))
+
+    def vector2set(self,data,fold:float=3.0,
+                   nmin:int=None,nmax:int=None,**kwargs):
+        """
+        convert dataframe to the outlier set for reference
+
+        Parameters
+        ----------
+        data: dataframe
+            feature x sample dataframe
+
+        fold: float
+            indicates fold change determining the outliers
+
+        nmin,nmax: int
+            indicate the minimum/maximum number of each set 
+
+        """
+        return self.__process.vec2set(mtx=data,fold=fold,nmin=nmin,nmax=nmax,
+                                      two_sided=False,**kwargs)
+
+
+    ### data control ###
+    def fit(self,data:dict,keep_whole:bool=False,nmin=None):
+        """
+        set a reference data instance
+        
+        Parameters
+        ----------
+        data: dict
+            a dictionary of sets like {"XXXX":{"aa","bb"},"YYYY":{"cc","dd","ee"},...}
+
+        keep_whole: boolean
+            whether whole features is conserved when already registered
+
+        nmin: int
+            indicates the number of features necessary for each set
+
+        """
+        self.data.set_ref(data=data)
+        self.__ref = self.data.get_ref()
+        if keep_whole:
+            if len(self.__whole)==0:
+                raise ValueError("!! set_whole() or turn off keep_whole !!")
+            else:
+                self.data.adjust_ref()
+        else:
+            self.__whole = set(chain.from_iterable(self.__ref.values()))
+            self.data.set_whole(self.__whole)
+        if nmin is not None:
+            temp = self.__ref.copy()
+            for k,v in self.__ref.items():
+                if len(v) < nmin:
+                    del temp[k]
+            self.__ref = temp
+            self.data.set_ref(data=self.__ref)
+        self.__compiled = RefMatrix(self.__ref) # integer-coded membership for calc
+            
+    def set_whole(self,whole:set):
+        """
+        set whole features
+        
+        Parameters
+        ----------
+        whole: set
+            indicates whole features
+        
+        """
+        self.data.set_whole(whole)
+        self.__whole = self.data.get_whole()
+        if len(self.data.get_ref())!=0:
+            self.data.adjust_ref()
+
+    def get_ref(self):
+        """ get reference data instance """
+        return self.data.get_ref()
+
+    def get_obj(self):
+        """ get an object data instance """
+        return self.data.get_obj()
+
+    def get_whole(self):
+        return self.__whole
+
+
+    def get_calculator(self):
+        """ get calculater object """
+        return self.__calc
+
+
+    ### calculation ###
+    def calc(self,data,fterm=None,method:str="standard",alpha:float=0.25,n_jobs:int=1,
+             dtype=np.float64,chunk_size:int=None,memory_limit:int=None,bins:int=512,
+             sketch:int=None,threshold:float=None,checkpoint:str=None,block:int=1024,
+             normalize:bool=False): # realization
+        """
+        conduct ssGSEA
+
+        Parameters
+        -------
+        data: dataframe
+            feature x sample dataframe
+
+        fterm: str, int or list
+            indicate the term of interest or the corresponding No.
+            a list of terms is scored in one pass and returned as term x sample
+
+        method: str
+            indicate a method for calculating the enrichment score
+            "starndard": employed in the original paper Barbie, et al, 2009
+            "kuiper": Kuiper test statistics, good when up/down genes are mixed, tail sensitive
+            "gsva": GSVA like statistics, good when unidirection (ex. up only)
+            "gsva_kcdf": GSVA (Hanzelmann, et al., 2013), each feature is converted into
+            the kernel CDF statistics across the samples and scored with the rank scores
+
+        alpha: float, (0,1]
+            indicate weight of center
+            0.25 is employed in the original paper (Barbie,et al.,2009)
+            tau of GSVA for "gsva_kcdf", 1 in the original paper
+
+        n_jobs: int
+            the number of processes sharing the samples in the exploratory mode
+            -1 means all the cpus
+            the data is placed in shared memory once, not copied for each process
+
+        dtype: numpy dtype
+            float64 (default) or float32 for the whole scoring
+            float32 halves the memory, the scores agree with float64 within 2/(feature No.)
+            as asserted by the tests, e.g. 1e-4 with 20000 features
+
+        chunk_size: int
+            the number of sets scored at once, all the sets if None
+
+        memory_limit: int
+            approximate upper limit (bytes) of the working arrays
+            a large library is processed in set blocks and stitched into one result
+            used in the exploratory mode
+
+        bins: int
+            the number of grid points of the kernel CDF for "gsva_kcdf"
+            the exact O(feature x sample^2) estimate if None
+
+        sketch: int
+            the number of rank bins for approximate scoring in the exploratory mode
+            each sample is binned by quantile breakpoints instead of ranked and
+            the error bound of each score is obtained by get_bound(), exact if None
+
+        threshold: float
+            the pairs of terms and samples whose |score| + bound reaches threshold
+            are scored again exactly, used with sketch
+
+        checkpoint: str
+            a directory where each block of samples is saved as .npy in the exploratory mode
+            with manifest.json of the reference fingerprint, the parameters
+            and the digests of the labels and the values of the data
+            a rerun with the same data and parameters skips the saved blocks
+
+        block: int
+            the number of samples in each block saved in checkpoint
+
+        normalize: boolean
+            whether the scores are normalized with the maximum of each term in the scoring pass,
+            the same as normalize_score(), only in the exploratory mode without sketch
+
+        Returns res
+        -------
+        res: df
+            gene set enrichment score
+
+        """
+        if normalize and ((fterm is not None) or (sketch is not None)):
+            raise ValueError("!! normalize is only available in the exploratory mode without sketch !!")
+        self.__alpha = alpha
+        self.__fterm = fterm
+        self.__normalize = normalize
+        self.__bound = pd.DataFrame()
+        self.__set_method(method)
+        self.data.set_obj(data)
+        self.__obj = self.data.get_obj()
+        temp = self.__obj # not modified by the calculation
+        if self.__method=="gsva_kcdf":
+            temp = self.__calc.kcdf(temp,bins=bins) # depends on all the samples
+        if fterm is None:
+            self.__mode = "exploratory"
+            self.__set_matrix()
+            if checkpoint is not None:
+                if sketch is not None:
+                    raise ValueError("!! checkpoint is not available with sketch !!")
+                res = self.__calc_checkpoint(temp,checkpoint,block,bins=bins,n_jobs=n_jobs,dtype=dtype,
+                                             chunk_size=chunk_size,memory_limit=memory_limit,
+                                             normalize=normalize)
+            elif sketch is None:
+                # all the samples are ranked at once and scored in blocks
+                res = self.__calc.calc_matrix(obj=temp,ref=self.__compiled,alpha=alpha,
+                                              n_jobs=n_jobs,dtype=dtype,
+                                              chunk_size=chunk_size,memory_limit=memory_limit,
+                                              normalize=normalize)
+            else:
+                # a fast first pass, only the pairs passing threshold are scored exactly
+                res = self.__calc.calc_sketch(obj=temp,ref=self.__compiled,alpha=alpha,bins=sketch,
+                                              threshold=threshold,n_jobs=n_jobs,dtype=dtype,
+                                              chunk_size=chunk_size,memory_limit=memory_limit)
+                self.__bound = self.__calc.bound
+            res.attrs = self.__get_attrs()
+            if sketch is not None:
+                res.attrs["sketch"] = sketch # approximate scores are not extended by update()
+        else:
+            self.__mode = "focused"
+            self.__fterm = fterm
+            if isinstance(fterm,list):
+                # the data is ranked once and the hits of all the terms are scored at once
+                keys = self.__compiled.keys
+                self.__fterm = [keys[v] if type(v)==int else v for v in fterm]
+                self.__set_matrix()
+                res = self.__calc.calc_matrix(obj=temp,ref=self.__compiled.subset(self.__fterm),
+                                              alpha=alpha,n_jobs=n_jobs,dtype=dtype,
+                                              chunk_size=chunk_size,memory_limit=memory_limit,sort=False)
+            elif self.__method=="gsva_kcdf":
+                # the random walk of GSVA is given only by the engine for all the samples
+                self.__calc.to_kcdfgsva()
+                key = self.__compiled.keys[fterm] if type(fterm)==int else fterm
+                res = self.__calc.calc_matrix(obj=temp,ref=self.__compiled.subset([key]),
+                                              alpha=alpha,dtype=dtype,sort=False)
+                res = res.T.rename(columns={key:"ES"}).sort_values(by="ES",ascending=False)
+            else:
+                self.__calc.to_ssgsea()
+                res = self.__calc.calc(obj=temp,ref=self.__ref,alpha=alpha,fterm=fterm,dtype=dtype)
+        self.res = res
+        return res
+
+
+    def partial_calc(self,data,n_jobs:int=1,dtype=np.float64,
+                     chunk_size:int=None,memory_limit:int=None):
+        """
+        score new samples in the exploratory mode
+        with the method, alpha and normalize of the last calc() or the stored result
+        the result is not stored, use update() to append it
+
+        Parameters
+        -------
+        data: dataframe
+            feature x sample dataframe of the new samples
+
+        n_jobs,dtype,chunk_size,memory_limit
+            see calc()
+
+        Returns res
+        -------
+        res: df
+            gene set enrichment score of the new samples
+
+        """
+        if self.__mode!="exploratory":
+            raise ValueError("!! calc() in the exploratory mode before this method !!")
+        if self.__method=="gsva_kcdf":
+            raise ValueError("!! gsva_kcdf depends on all the samples: calc() with the whole data !!")
+        self.data.set_obj(data)
+        self.__obj = self.data.get_obj()
+        res = self.__calc.calc_matrix(obj=self.__obj,ref=self.__compiled,alpha=self.__alpha,
+                                      n_jobs=n_jobs,dtype=dtype,
+                                      chunk_size=chunk_size,memory_limit=memory_limit,
+                                      normalize=self.__normalize)
+        res.attrs = self.__get_attrs()
+        return res
+
+
+    def update(self,data,path:str=None,**kwargs):
+        """
+        append the scores of new samples to the stored exploratory result
+        only the new samples are scored, since ssGSEA scores are independent between samples
+        a result approximated by sketch is not extended
+
+        Parameters
+        -------
+        data: dataframe
+            feature x sample dataframe of the new samples
+
+        path: str
+            a pickle of the result to be extended and overwritten
+            the current result is saved there if it does not exist yet
+
+        kwargs
+            passed to partial_calc()
+
+        Returns res
+        -------
+        res: df
+            gene set enrichment score of the stored and the new samples
+
+        """
+        if (path is not None) and os.path.exists(path):
+            stored = pd.read_pickle(path)
+        else:
+            stored = self.res
+        if stored.empty:
+            raise ValueError("!! No result stored: calc() or indicate path !!")
+        attrs = dict(stored.attrs)
+        if attrs.get("sketch") is not None:
+            raise ValueError("!! An approximate result by sketch cannot be extended: calc() without sketch !!")
+        if attrs.get("fingerprint")!=self.__compiled.fingerprint():
+            raise ValueError("!! Reference does not match the stored result: fit() the same library !!")
+        dup = [v for v in data.columns if v in stored.columns]
+        if len(dup) > 0:
+            raise ValueError("!! Samples already scored: {} !!".format(dup))
+        self.__mode = "exploratory"
+        self.__alpha = attrs["alpha"]
+        self.__normalize = attrs.get("normalize",False)
+        self.__set_method(attrs["method"])
+        self.__set_matrix()
+        new = self.partial_calc(data,**kwargs)
+        res = pd.concat([stored,new.loc[stored.index]],axis=1)
+        res.attrs = attrs
+        if path is not None:
+            temp = path + ".tmp"
+            res.to_pickle(temp)
+            os.replace(temp,path) # the stored result is never left half-written
+        self.res = res
+        return res
+
+
+    def calc_stream(self,data,out:str=None,index=None,columns=None,key:str=None,
+                    block:int=1024,method:str="standard",alpha:float=0.25,**kwargs):
+        """
+        conduct ssGSEA in the exploratory mode for a matrix larger than memory
+        blocks of samples are streamed through the scoring engine
+        and the scores are written into the output one block after another
+
+        Parameters
+        -------
+        data: dataframe, 2d array or str
+            feature x sample matrix given as a dataframe, an ndarray/memmap,
+            or the path of .npy (memory-mapped), HDF5 (h5py) or Parquet (pyarrow)
+
+        out: str
+            path of the output .npy memory-mapped (tag x sample)
+            kept in memory if None
+
+        index: list
+            feature names of the rows, necessary for an array, .npy and HDF5
+
+        columns: list
+            sample names, 0,1,2,... if None (array, .npy and HDF5)
+
+        key: str
+            name of the dataset in HDF5
+
+        block: int
+            the number of samples loaded at once
+
+        method,alpha
+            see calc()
+
+        kwargs
+            n_jobs, dtype, chunk_size and memory_limit, see calc()
+
+        Returns res
+        -------
+        res: df
+            gene set enrichment score (tag x sample) in the order of the reference,
+            a view of the output memmap when out is indicated
+
+        """
+        if len(self.__compiled.keys)==0:
+            raise ValueError("!! fit() before this process !!")
+        if method=="gsva_kcdf":
+            raise ValueError("!! gsva_kcdf depends on all the samples: use calc() !!")
+        self.__alpha = alpha
+        self.__fterm = None
+        self.__mode = "exploratory"
+        self.__normalize = bool(kwargs.get("normalize",False))
+        self.__set_method(method)
+        self.__set_matrix()
+        dtype = np.dtype(kwargs.get("dtype",np.float64))
+        with ColumnSource(data,index=index,columns=columns,key=key) as source: # the file is closed at the end
+            shape = (len(self.__compiled.keys),source.shape[1])
+            if out is None:
+                score = np.zeros(shape,dtype=dtype)
+            else:
+                score = np.lib.format.open_memmap(out,mode="w+",dtype=dtype,shape=shape)
+            for start,temp in source.blocks(block):
+                res = self.__calc.calc_matrix(obj=temp,ref=self.__compiled,alpha=alpha,sort=False,**kwargs)
+                score[:,start:start + temp.shape[1]] = res.values
+                if out is not None:
+                    score.flush()
+        res = pd.DataFrame(score,index=self.__compiled.keys,columns=source.columns,copy=False)
+        res.attrs = self.__get_attrs()
+        self.res = res
+        return res
+
+
+    def __calc_checkpoint(self,data,path:str,block:int,bins:int=512,**kwargs):
+        """ score blocks of samples saved in path one after another, the saved ones are loaded """
+        manifest = self.__get_attrs()
+        manifest.update({"dtype":np.dtype(kwargs.get("dtype",np.float64)).str,"block":block,
+                         "normalize":bool(kwargs.get("normalize",False)),
+                         "index":_digest(data.index),"columns":_digest(data.columns),
+                         "values":_checksum(data)})
+        if self.__method=="gsva_kcdf":
+            manifest["bins"] = bins
+        file = os.path.join(path,"manifest.json")
+        if os.path.exists(file):
+            with open(file) as f:
+                stored = json.load(f)
+            if stored!=manifest:
+                diff = sorted(k for k in set(stored) | set(manifest) if stored.get(k)!=manifest.get(k))
+                raise ValueError("!! checkpoint of another run, different in {}: indicate a new directory !!".format(diff))
+        else:
+            os.makedirs(path,exist_ok=True)
+            with open(file + ".tmp","w") as f:
+                json.dump(manifest,f,indent=2)
+            os.replace(file + ".tmp",file)
+        keys = self.__compiled.keys
+        score = np.zeros((len(keys),data.shape[1]),dtype=np.dtype(manifest["dtype"]))
+        for start,temp in ColumnSource(data).blocks(block):
+            out = os.path.join(path,"block_{:09d}.npy".format(start))
+            if os.path.exists(out):
+                score[:,start:start + temp.shape[1]] = np.load(out)
+                continue
+            res = self.__calc.calc_matrix(obj=temp,ref=self.__compiled,alpha=self.__alpha,sort=False,**kwargs)
+            with open(out + ".tmp","wb") as f:
+                np.save(f,res.values)
+            os.replace(out + ".tmp",out) # a preempted block is never left half-written
+            score[:,start:start + temp.shape[1]] = res.values
+        res = pd.DataFrame(score,index=keys,columns=data.columns)
+        if res.shape[1] > 0:
+            res = res.sort_values(by=res.columns[0],ascending=False)
+        return res
+
+
+    def get_bound(self):
+        """
+        error bounds (term x sample) of the approximate scores by calc(sketch=...)
+        the absolute error of each score is below the bound, 0 for the exact scores
+
+        """
+        if self.__bound.empty:
+            raise ValueError("!! No bound: calc() with sketch before this method !!")
+        return self.__bound
+
+
+    def __set_method(self,method:str):
+        """ set the method for calculating the enrichment score """
+        self.__method = method
+        if method=="standard":
+            self.__calc.to_standard()
+            print("Standard method",flush=True)
+        elif method=="kuiper":
+            self.__calc.to_kuiper()
+            print("Kuiper method",flush=True)
+        elif method=="gsva":
+            self.__calc.to_gsva()
+            print("GSVA method",flush=True)
+        elif method=="gsva_kcdf":
+            self.__calc.to_kcdfgsva()
+            print("GSVA with kernel CDF",flush=True)
+        else:
+            raise ValueError("!! Wrong method: choose 'standard', 'kuiper', 'gsva' or 'gsva_kcdf' !!")
+
+
+    def __set_matrix(self):
+        """ set the algorithm scoring all the samples at once for the method """
+        if self.__method=="gsva_kcdf":
+            self.__calc.to_kcdfgsva()
+        else:
+            self.__calc.to_expssgsea()
+
+
+    def __get_attrs(self):
+        """ conditions of the exploratory result, checked when it is extended """
+        return {"fingerprint":self.__compiled.fingerprint(),"method":self.__method,"alpha":self.__alpha,
+                "normalize":bool(self.__normalize)}
+
+
+    def normalize_score(self, data=None):
+        """
+        normalize enrichment score with maximum value
+        Note that this method can be applied
+        only when the standard method was employed for calculation
+        
+        """
+        if self.__mode=="focused":
+            raise ValueError("!! Only applicable to the exploratory mode !!")
+        if data is None:
+            n = self.data.obj.data.shape[0] # 230317, n is obtained from the previous data
+        else:
+            n = data.shape[0] # 230317, n is obtained from the indicated data            
+        if self.res.empty:
+            raise ValueError("!! No result stored: calc() before this method !!")
+        return self.__calc.normalize(self.res,self.__compiled,n)
+
+
+    ### visualization ###
+    def set_res(self,data):
+        """ set a result """
+        self.res = data
+
+
+    def plot(self,keyword:list=[],fterm:str=None,mode:str=None,**kwargs): # realization
+        """
+        visualize a result of enrichment analysis
+
+        Parameters
+        ----------
+        fterm: str
+            indicate the group of interest
+            necessary for the focused mode with a list of terms
+
+        mode: str
+            indicate ssGSEA mode: 'exploratory' or 'focused'
+            if None (default), plot the current result
+
+        keyword: list
+            indicate samples to be visualized
+
+        fileout: str
+            indicate the path for the output image
+
+        dpi: int
+            indicate dpi of the output image
+            
+        xlabel,ylabel: str
+            indicate the name of x and y axes
+
+        title: str
+            indicate the title of the plot
+
+        color: str
+            indicate the color of swarmplot (if sample size is less than 30)
+
+        palette: list
+            indicate color of boxplot
+
+        alpha: float
+            indicate transparency of the bars: (0,1)
+
+        size: float
+            size of the markers
+
+        fontsize: float
+            indicate the fontsize in the plot
+
+        textsize: float
+            indicate the fontsize of the texts in the bars
+
+        figsize: tuple
+            indicate the size of the plot
+
+        """
+        if mode is None: # plot the current result
+            if self.__mode=="exploratory":
+                # exploratory mode
+                if fterm is None:
+                    raise ValueError("!! Indicate fterm (focused term) !!")
+                else:
+                    data = self.res.T[fterm]
+                    self.__plot.plot(data=data,keyword=keyword,focus=fterm,**kwargs)
+            elif self.__mode=="focused":
+                # focused mode
+                if isinstance(self.__fterm,list):
+                    if fterm is None:
+                        raise ValueError("!! Indicate fterm (one of the focused terms) !!")
+                    data = self.res.T[fterm]
+                    self.__plot.plot(data=data,keyword=keyword,focus=fterm,**kwargs)
+                else:
+                    self.__plot.plot(data=self.res,keyword=keyword,focus=self.__fterm,**kwargs)
+            else:
+                raise ValueError("!! Indicate mode: 'exploratory' or 'focused' !!")
+        elif mode=="exploratory": # plot a loaded result
+            # exploratory mode
+            if fterm is None:
+                raise ValueError("!! Indicate fterm (focused term) !!")
+            else:
+                data = self.res.T[fterm]
+                self.__plot.plot(data=data,keyword=keyword,focus=fterm,**kwargs)
+        elif mode=="focused": # plot a loaded result
+            # focused mode
+            if fterm is None:
+                raise ValueError("!! Indicate fterm (focused term) !!")
+            elif fterm in self.res.index: # a result of a list of terms
+                self.__plot.plot(data=self.res.T[fterm],keyword=keyword,focus=fterm,**kwargs)
+            else:
+                self.__plot.plot(data=self.res,keyword=keyword,focus=fterm,**kwargs)
+        else:
+            raise ValueError("!! Wrong mode: 'exploratory' or 'focused' !!")
+
+
+    ### other ###
+    def generate_test_data(self):
+        """ generate data for test """    
+        # prepare reference
+        key = [''.join(random.choices(string.ascii_letters, k=5)) for i in range(10)]
+
+        def fxn():
+            return {random.randint(0,50) for j in range(random.randint(10,100))}
+
+        val = [fxn() for i in range(9)] + [{1,2,3,4,5,6,7}]
+        ref = dict(zip(key,val))
+
+        # prepare object
+        col = ["control_{}".format(i + 1) for i in range(5)]
+        col += ["treated_{}".format(i + 1) for i in range(5)]
+        obj = pd.DataFrame([np.random.randn(10000) for i in range(10)],index=col).T
+        print("generate test data as follows:")
+        print('    ref: dict, {"XXXX":{"aa","bb"},"YYYY":{"cc","dd","ee"},...}')
+        print('    obj: dataframe, feature x sample')
+        return ref,obj
+
+
+def _digest(index):
+    """ sha1 digest of the labels, identifying the data of a checkpoint """
+    return hashlib.sha1("\t".join(map(str,index)).encode()).hexdigest()
+
+
+def _checksum(data,size:int=1024):
+    """
+    sha1 digest of the values, so that a recomputed matrix with the same labels is not resumed
+    the columns are hashed in blocks, one column after another
+
+    """
+    h = hashlib.sha1()
+    for start in range(0,data.shape[1],size):
+        h.update(np.ascontiguousarray(data.iloc[:,start:start + size].values.T,dtype=np.float64).tobytes())
+    return h.hexdigest()
@@ -1,6 +1,6 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Wed Dec 25 15:46:32 2019
-
-@author: tadahaya
-"""
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Dec 25 15:46:32 2019
+
+@author: tadahaya
+"""
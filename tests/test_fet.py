@@ -1,83 +1,136 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Mon Sep 23 13:05:34 2019
-
-@author: tadahaya
-"""
-import unittest
-import pandas as pd
-import os
-import sys
-import math
-
-from enan.fet import FET
-
-class SampleTest(unittest.TestCase):
-    CLS_VAL = 'none'
-
-    # called when test class initialization
-    @classmethod
-    def setUpClass(cls):
-        if sys.flags.debug:
-            print('> setUpClass method is called.')
-        cls.CLS_VAL = '> setUpClass : initialized!'
-        if sys.flags.debug:
-            print(cls.CLS_VAL)
-
-    # called when test class end
-    @classmethod
-    def tearDownClass(cls):
-        if sys.flags.debug:
-            print('> tearDownClass method is called.')
-        cls.CLS_VAL = '> tearDownClass : released!'
-        if sys.flags.debug:
-            print(cls.CLS_VAL)
-
-    # called when a test method runs
-    def setUp(self):
-        if sys.flags.debug:
-            print(os.linesep + '> setUp method is called.')
-        self.smpl = FET()
-
-    # called when a test method ends
-    def tearDown(self):
-        if sys.flags.debug:
-            print(os.linesep + '> tearDown method is called.')
-
-    def _df_checker(self,df):
-        if type(df)!=pd.core.frame.DataFrame:
-            return False
-        elif df.shape[0]==0:
-            return False
-        else:
-            head = df.head(1)
-            judge = math.isnan(head.iat[0,0])
-            return not judge
-
-    def _sr_checker(self,sr):
-        if type(sr)!=pd.core.series.Series:
-            return False
-        if sr.shape[0]==0:
-            return False
-        else:
-            head = sr.head(1)
-            judge = math.isnan(head.iat[0])
-            return not judge
-
-    def test_calc(self):
-        # prepare test patterns
-        test_patterns = [
-            ("fdr_bh","greater",None), # (arg1, arg2, ..., expected result)
-            ("fdr_bh","two-sided",None), # (arg1, arg2, ..., expected result)
-            ("fdr_bh","less",None), # (arg1, arg2, ..., expected result)
-            ("fdr_bh","greater",3), # (arg1, arg2, ..., expected result)
-            ]
-
-        ref,obj = self.smpl.generate_test_data()
-        self.smpl.fit(ref)
-
-        ### loop for sweeping all conditions
-        for tcorr,tmode,tfocus in test_patterns:
-            with self.subTest(correction=tcorr,mode=tmode,focus=tfocus):
-                self.assertTrue(self._df_checker(self.smpl.calc(data=obj,
-                                                 correction=tcorr,mode=tmode,focus=tfocus)))
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Sep 23 13:05:34 2019
+
+@author: tadahaya
+"""
+import unittest
+import pandas as pd
+import os
+import sys
+import math
+import numpy as np
+import scipy.stats as stats
+
+from enan.fet import FET
+from enan.calculator._ref import RefMatrix
+from enan.calculator._fet import do_fet,_fisher_exact
+
+class SampleTest(unittest.TestCase):
+    CLS_VAL = 'none'
+
+    # called when test class initialization
+    @classmethod
+    def setUpClass(cls):
+        if sys.flags.debug:
+            print('> setUpClass method is called.')
+        cls.CLS_VAL = '> setUpClass : initialized!'
+        if sys.flags.debug:
+            print(cls.CLS_VAL)
+
+    # called when test class end
+    @classmethod
+    def tearDownClass(cls):
+        if sys.flags.debug:
+            print('> tearDownClass method is called.')
+        cls.CLS_VAL = '> tearDownClass : released!'
+        if sys.flags.debug:
+            print(cls.CLS_VAL)
+
+    # called when a test method runs
+    def setUp(self):
+        if sys.flags.debug:
+            print(os.linesep + '> setUp method is called.')
+        self.smpl = FET()
+
+    # called when a test method ends
+    def tearDown(self):
+        if sys.flags.debug:
+            print(os.linesep + '> tearDown method is called.')
+
+    def _df_checker(self,df):
+        if type(df)!=pd.core.frame.DataFrame:
+            return False
+        elif df.shape[0]==0:
+            return False
+        else:
+            head = df.head(1)
+            judge = math.isnan(head.iat[0,0])
+            return not judge
+
+    def _sr_checker(self,sr):
+        if type(sr)!=pd.core.series.Series:
+            return False
+        if sr.shape[0]==0:
+            return False
+        else:
+            head = sr.head(1)
+            judge = math.isnan(head.iat[0])
+            return not judge
+
+    def test_calc(self):
+        # prepare test patterns
+        test_patterns = [
+            ("fdr_bh","greater",None), # (arg1, arg2, ..., expected result)
+            ("fdr_bh","two-sided",None), # (arg1, arg2, ..., expected result)
+            ("fdr_bh","less",None), # (arg1, arg2, ..., expected result)
+            ("fdr_bh","greater",3), # (arg1, arg2, ..., expected result)
+            ]
+
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+
+        ### loop for sweeping all conditions
+        for tcorr,tmode,tfocus in test_patterns:
+            with self.subTest(correction=tcorr,mode=tmode,focus=tfocus):
+                self.assertTrue(self._df_checker(self.smpl.calc(data=obj,
+                                                 correction=tcorr,mode=tmode,focus=tfocus)))
+
+    def test_fisher_exact(self):
+        # all the 2x2 tables of small sizes, compared with scipy one by one
+        table = [(a,b,c,n - a - b - c) for n in range(1,13) for a in range(n + 1)
+                 for b in range(n + 1 - a) for c in range(n + 1 - a - b)]
+        c00,c01,c10,c11 = np.array(table).T
+        for mode in ["greater","two-sided","less"]:
+            with self.subTest(mode=mode):
+                pval = _fisher_exact(c00,c01,c10,c11,alternative=mode)
+                expected = [stats.fisher_exact([[a,b],[c,d]],alternative=mode)[1] for a,b,c,d in table]
+                self.assertTrue(np.array_equal(pval,expected))
+        with self.assertRaises(ValueError):
+            _fisher_exact([1],[-1],[0],[1])
+
+    def test_inverted(self):
+        # terms and overlaps gathered from the inverted index are the same as the set intersections
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        whole = self.smpl.get_whole()
+        for query in [obj,{1,2,3},{1000},set()]:
+            with self.subTest(query=sorted(query)[:5]):
+                res = self.smpl.calc(data=query)
+                touched = {k for k,v in ref.items() if len(query & v) > 0}
+                self.assertEqual(set(res.index),touched)
+                for k in res.index:
+                    self.assertEqual(res.at[k,"overlap"],query & ref[k])
+                    self.assertEqual(res.at[k,"hit No."],len(query & ref[k]))
+                    self.assertEqual(res.at[k,"total No."],len(ref[k]))
+                each = do_fet(query,ref,whole)
+                self.assertTrue(each.equals(do_fet(query,RefMatrix(ref),whole)))
+
+    def test_calc_batch(self):
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        queries = {"obj":obj,"small":{1,2,3},"none":{1000},"wide":set(range(0,50,2))}
+        for mode in ["greater","two-sided","less"]:
+            res = self.smpl.calc_batch(queries,mode=mode)
+            for k,v in queries.items():
+                with self.subTest(mode=mode,query=k):
+                    each = self.smpl.calc(data=v,mode=mode)
+                    batch = res[res["query"]==k].set_index("term")
+                    self.assertEqual(set(batch.index),set(each.index))
+                    if each.shape[0]==0:
+                        continue
+                    batch = batch.loc[each.index]
+                    for c in ["p value","adjusted p value","hit No.","total No."]:
+                        self.assertTrue(np.allclose(batch[c].astype(float),each[c].astype(float),rtol=1e-12,atol=0))
+        res = self.smpl.calc_batch(list(queries.values()),focus=2)
+        self.assertTrue((res.groupby("query").size() <= 2).all())
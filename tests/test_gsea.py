@@ -1,83 +1,288 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Mon Sep 23 13:05:34 2019
-
-@author: tadahaya
-"""
-import unittest
-import pandas as pd
-import os
-import sys
-import math
-
-from enan.gsea import GSEA
-
-class SampleTest(unittest.TestCase):
-    CLS_VAL = 'none'
-
-    # called when test class initialization
-    @classmethod
-    def setUpClass(cls):
-        if sys.flags.debug:
-            print('> setUpClass method is called.')
-        cls.CLS_VAL = '> setUpClass : initialized!'
-        if sys.flags.debug:
-            print(cls.CLS_VAL)
-
-    # called when test class end
-    @classmethod
-    def tearDownClass(cls):
-        if sys.flags.debug:
-            print('> tearDownClass method is called.')
-        cls.CLS_VAL = '> tearDownClass : released!'
-        if sys.flags.debug:
-            print(cls.CLS_VAL)
-
-    # called when a test method runs
-    def setUp(self):
-        if sys.flags.debug:
-            print(os.linesep + '> setUp method is called.')
-        self.smpl = GSEA()
-
-    # called when a test method ends
-    def tearDown(self):
-        if sys.flags.debug:
-            print(os.linesep + '> tearDown method is called.')
-
-    def _df_checker(self,df):
-        if type(df)!=pd.core.frame.DataFrame:
-            return False
-        elif df.shape[0]==0:
-            return False
-        else:
-            head = df.head(1)
-            judge = math.isnan(head.iat[0,0])
-            return not judge
-
-    def _sr_checker(self,sr):
-        if type(sr)!=pd.core.series.Series:
-            return False
-        if sr.shape[0]==0:
-            return False
-        else:
-            head = sr.head(1)
-            judge = math.isnan(head.iat[0])
-            return not judge
-
-    def test_calc(self):
-        # prepare test patterns
-        test_patterns = [
-            ("standard",0), # (arg1, arg2, ..., expected result)
-            ("kuiper",0), # (arg1, arg2, ..., expected result)
-            ("gsva",0), # (arg1, arg2, ..., expected result)
-            ("standard",0.5) # (arg1, arg2, ..., expected result)
-            ]
-
-        ref,obj = self.smpl.generate_test_data()
-        self.smpl.fit(ref)
-
-        ### loop for sweeping all conditions
-        for tmethod,talpha in test_patterns:
-            with self.subTest(method=tmethod,alpha=talpha):
-                self.assertTrue(self._df_checker(self.smpl.calc(data=obj,
-                                                 method=tmethod,alpha=talpha)))
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Sep 23 13:05:34 2019
+
+@author: tadahaya
+"""
+import unittest
+import pandas as pd
+import numpy as np
+import os
+import sys
+import math
+import tempfile
+
+from enan.gsea import GSEA
+from enan.calculator._gsea import Calculator
+from enan.calculator._ref import RefMatrix
+
+class SampleTest(unittest.TestCase):
+    CLS_VAL = 'none'
+
+    # called when test class initialization
+    @classmethod
+    def setUpClass(cls):
+        if sys.flags.debug:
+            print('> setUpClass method is called.')
+        cls.CLS_VAL = '> setUpClass : initialized!'
+        if sys.flags.debug:
+            print(cls.CLS_VAL)
+
+    # called when test class end
+    @classmethod
+    def tearDownClass(cls):
+        if sys.flags.debug:
+            print('> tearDownClass method is called.')
+        cls.CLS_VAL = '> tearDownClass : released!'
+        if sys.flags.debug:
+            print(cls.CLS_VAL)
+
+    # called when a test method runs
+    def setUp(self):
+        if sys.flags.debug:
+            print(os.linesep + '> setUp method is called.')
+        self.smpl = GSEA()
+
+    # called when a test method ends
+    def tearDown(self):
+        if sys.flags.debug:
+            print(os.linesep + '> tearDown method is called.')
+
+    def _df_checker(self,df):
+        if type(df)!=pd.core.frame.DataFrame:
+            return False
+        elif df.shape[0]==0:
+            return False
+        else:
+            head = df.head(1)
+            judge = math.isnan(head.iat[0,0])
+            return not judge
+
+    def _sr_checker(self,sr):
+        if type(sr)!=pd.core.series.Series:
+            return False
+        if sr.shape[0]==0:
+            return False
+        else:
+            head = sr.head(1)
+            judge = math.isnan(head.iat[0])
+            return not judge
+
+    def test_calc(self):
+        # prepare test patterns
+        test_patterns = [
+            ("standard",0), # (arg1, arg2, ..., expected result)
+            ("kuiper",0), # (arg1, arg2, ..., expected result)
+            ("gsva",0), # (arg1, arg2, ..., expected result)
+            ("standard",0.5) # (arg1, arg2, ..., expected result)
+            ]
+
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+
+        ### loop for sweeping all conditions
+        for tmethod,talpha in test_patterns:
+            with self.subTest(method=tmethod,alpha=talpha):
+                self.assertTrue(self._df_checker(self.smpl.calc(data=obj,
+                                                 method=tmethod,alpha=talpha)))
+
+    def test_location(self):
+        ref,obj = self.smpl.generate_test_data()
+        ref["absent"] = {-1,-2,-3}
+        data = obj.iloc[:,0].sort_values(ascending=False)
+        loc = RefMatrix(ref).location(data.index)
+        expected = [[(v in tag) for v in data.index] for tag in ref.values()]
+        self.assertTrue((loc==np.array(expected)).all())
+
+    def test_extremum(self):
+        ref,obj = self.smpl.generate_test_data()
+        data = obj.iloc[:,0]
+        calc = Calculator()
+        for method in ["standard","kuiper","gsva"]:
+            with self.subTest(method=method):
+                getattr(calc,"to_{}".format(method))()
+                full = calc.calc(obj=data,ref=ref,alpha=0.5,curve=True)
+                stream = calc.calc(obj=data,ref=ref,alpha=0.5)
+                self.assertTrue(np.allclose(full["ES"],stream.loc[full.index,"ES"]))
+
+    def test_repeated_label(self):
+        # a repeated label is a hit at each row, the same as distinct labels in the set
+        ref,obj = self.smpl.generate_test_data()
+        dup = pd.concat([obj,obj.iloc[:5]])
+        renamed = dup.copy()
+        renamed.index = list(obj.index) + [10000 + i for i in obj.index[:5]]
+        extended = {k:v | {10000 + i for i in v if i < 5} for k,v in ref.items()}
+        for method in ["standard","kuiper","gsva"]:
+            with self.subTest(method=method):
+                self.smpl.fit(ref)
+                res = self.smpl.calc(data=dup,method=method)
+                self.smpl.fit(extended)
+                expected = self.smpl.calc(data=renamed,method=method)
+                self.assertTrue(np.allclose(res.loc[expected.index],expected))
+
+    def test_calc_matrix(self):
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        res = self.smpl.calc(data=obj,method="kuiper",alpha=0.5)
+        calc = Calculator()
+        calc.to_kuiper()
+        for v in obj.columns:
+            with self.subTest(sample=v):
+                full = calc.calc(obj=obj[v],ref=ref,alpha=0.5,curve=True)
+                self.assertTrue(np.allclose(full["ES"],res.loc[full.index,v]))
+
+    def test_n_jobs(self):
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        for v in ["standard","gsva"]:
+            with self.subTest(method=v):
+                res = self.smpl.calc(data=obj,method=v,alpha=0.5)
+                res2 = self.smpl.calc(data=obj,method=v,alpha=0.5,n_jobs=2)
+                self.assertTrue(np.allclose(res.values,res2.loc[res.index,res.columns].values))
+
+    def test_dtype(self):
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        for v in ["standard","kuiper","gsva"]:
+            with self.subTest(method=v):
+                res = self.smpl.calc(data=obj,method=v,alpha=0.5)
+                res2 = self.smpl.calc(data=obj,method=v,alpha=0.5,dtype=np.float32)
+                self.assertEqual(res2.values.dtype,np.float32)
+                # float32 rounding may swap close values, which moves ES by ~1/n
+                self.assertTrue(np.allclose(res.values,res2.loc[res.index].values,atol=2/obj.shape[0]))
+        with self.assertRaises(ValueError):
+            self.smpl.calc(data=obj,dtype=np.int64)
+
+    def test_dtype_tolerance(self):
+        # the tolerance of float32 stated in _check_dtype at a realistic feature No.
+        rng = np.random.default_rng(0)
+        n = 20000
+        obj = pd.DataFrame(rng.normal(size=(n,3)),columns=["xxxx","yyyy","zzzz"])
+        ref = {"t{}".format(i):set(rng.choice(n,int(rng.integers(10,500)),replace=False).tolist()) for i in range(50)}
+        self.smpl.fit(ref)
+        for method in ["standard","kuiper","gsva"]:
+            for alpha in [0,0.25,1.0]:
+                with self.subTest(method=method,alpha=alpha):
+                    res = self.smpl.calc(data=obj,method=method,alpha=alpha)
+                    res2 = self.smpl.calc(data=obj,method=method,alpha=alpha,dtype=np.float32)
+                    err = np.abs(res.values - res2.loc[res.index,res.columns].values)
+                    self.assertTrue(np.all(err <= 2/n))
+
+    def test_chunk(self):
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        res = self.smpl.calc(data=obj,method="kuiper",alpha=0.5)
+        for k,v in [("chunk_size",3),("memory_limit",1 << 16)]:
+            with self.subTest(**{k:v}):
+                res2 = self.smpl.calc(data=obj,method="kuiper",alpha=0.5,**{k:v})
+                self.assertEqual(list(res.index),list(res2.index))
+                self.assertTrue(np.allclose(res.values,res2.values))
+
+    def test_calc_perm(self):
+        ref,obj = self.smpl.generate_test_data()
+        ref["enriched"] = set(obj["xxxx"].sort_values(ascending=False).index[:10])
+        self.smpl.fit(ref)
+        res = self.smpl.calc(data=obj,n_perm=200,seed=0)
+        self.assertEqual(list(res["xxxx"].columns),["ES","NES","p value","adjusted p value"])
+        pval = res["xxxx"]["p value"].dropna()
+        self.assertTrue(((pval > 0) & (pval <= 1)).all())
+        self.assertEqual(pval.min(),pval["enriched"])
+
+    def test_null_cache(self):
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        with tempfile.TemporaryDirectory() as temp:
+            calc = self.smpl.get_calculator()
+            calc.set_cache(maxsize=2,spill=temp)
+            res = self.smpl.calc(data=obj,n_perm=100,seed=0)
+            self.assertEqual(len(calc.get_cache()),2)
+            self.assertTrue(len(os.listdir(temp)) > 0)
+            # a hit gives the same result as a fresh calculation with the same seed
+            again = self.smpl.calc(data=obj,n_perm=100,seed=0)
+            self.assertTrue(np.array_equal(res.values,again.values,equal_nan=True))
+            res1 = self.smpl.calc(data=obj,n_perm=100,seed=1)
+            smpl = GSEA()
+            smpl.fit(ref)
+            fresh = smpl.calc(data=obj,n_perm=100,seed=1)
+            self.assertTrue(np.array_equal(res1.values,fresh.loc[res1.index,res1.columns].values,equal_nan=True))
+        # the nulls of the shared set sizes are reused for another library
+        member = list(range(60))
+        lib_a = {"a{}".format(k):set(member[:k]) for k in [20,30,40]}
+        lib_b = {"b{}".format(k):set(member[-k:]) for k in [20,30,50]}
+        calc.set_cache()
+        self.smpl.fit(lib_a)
+        self.smpl.calc(data=obj,n_perm=50,seed=0)
+        self.assertEqual(len(calc.get_cache()),3)
+        self.smpl.fit(lib_b)
+        res_b = self.smpl.calc(data=obj,n_perm=50,seed=0)
+        self.assertEqual(len(calc.get_cache()),4)
+        smpl = GSEA()
+        smpl.fit(lib_b)
+        fresh = smpl.calc(data=obj,n_perm=50,seed=0)
+        self.assertTrue(np.array_equal(res_b.values,fresh.loc[res_b.index,res_b.columns].values,equal_nan=True))
+
+    def test_running(self):
+        ref,obj = self.smpl.generate_test_data()
+        data = obj.iloc[:,0]
+        calc = Calculator()
+        calc.calc(obj=data,ref=ref,alpha=0.5,curve=True)
+        es,loc,keys,res = calc.get_details()
+        fterm = keys[-1]
+        run,hit,leading = calc.running(obj=data,ref=RefMatrix(ref),alpha=0.5,fterm=fterm)
+        self.assertTrue(np.allclose(run,es[:,-1]))
+        self.assertTrue((hit==loc[-1]).all())
+        self.assertTrue(set(leading) <= ref[fterm])
+
+    def test_keep_details(self):
+        ref,obj = self.smpl.generate_test_data()
+        data = obj.iloc[:,0]
+        calc = Calculator()
+        full = calc.calc(obj=data,ref=ref,alpha=0.5,curve=True)
+        es,loc,keys,res = calc.get_details()
+        light = Calculator(keep_details=False)
+        res2 = light.calc(obj=data,ref=ref,alpha=0.5,curve=True)
+        self.assertTrue(np.allclose(full["ES"],res2.loc[full.index,"ES"]))
+        self.assertEqual(light.get_details()[0].size,0)
+        self.assertEqual(light.get_details()[1].size,0)
+        terms = keys[-2:]
+        es2,loc2,keys2 = light.details(obj=data,ref=ref,alpha=0.5,terms=terms)
+        self.assertEqual(keys2,terms)
+        self.assertTrue(np.allclose(es2,es[:,-2:]))
+        self.assertTrue((loc2==loc[-2:]).all())
+
+    def test_leading_edge(self):
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        self.smpl.calc(data=obj,alpha=0.5,leading_edge=True)
+        leading = self.smpl.get_leading_edge()
+        self.assertEqual(set(leading.keys()),set(obj.columns))
+        self.assertEqual(leading["xxxx"].indices.dtype,np.int32)
+        decoded = self.smpl.get_leading_edge(sample_name="xxxx",decode=True)
+        calc = Calculator()
+        for k in ref.keys():
+            with self.subTest(term=k):
+                es,loc,lead = calc.running(obj=obj["xxxx"],ref=RefMatrix(ref),alpha=0.5,fterm=k)
+                self.assertEqual(set(lead),decoded[k])
+        # tied values are ranked in the same way as calc
+        tied = (obj*2).round()
+        res = self.smpl.calc(data=tied,alpha=0.5,leading_edge=True)
+        decoded = self.smpl.get_leading_edge(sample_name="xxxx",decode=True)
+        for k in ref.keys():
+            with self.subTest(term=k,tied=True):
+                es,loc,lead = calc.running(obj=tied["xxxx"],ref=RefMatrix(ref),alpha=0.5,fterm=k)
+                self.assertAlmostEqual(np.max(np.abs(es)),res.loc[k,"xxxx"])
+                self.assertEqual(set(lead),decoded[k])
+
+    def test_normalize(self):
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        res = self.smpl.calc(data=obj)
+        norm = self.smpl.normalize_score()
+        kmax = np.array([1 - len(ref[v])/obj.shape[0] for v in res.index])
+        self.assertTrue(np.allclose(norm.values,res.values/kmax[:,None]))
+        fused = self.smpl.calc(data=obj,normalize=True)
+        self.assertTrue(np.allclose(fused.loc[norm.index],norm))
+        self.smpl.calc(data=obj,n_perm=10,seed=0)
+        self.assertEqual(self.smpl.normalize_score().shape,(len(ref),obj.shape[1]))
+        with self.assertRaises(ValueError):
+            self.smpl.calc(data=obj,n_perm=10,normalize=True)
@@ -1,102 +1,335 @@
-# -*- coding: utf-8 -*-
-"""
-Created on Mon Sep 23 13:05:34 2019
-
-@author: tadahaya
-"""
-import unittest
-import pandas as pd
-import os
-import sys
-import math
-
-from enan.ssgsea import ssGSEA
-
-class SampleTest(unittest.TestCase):
-    CLS_VAL = 'none'
-
-    # called when test class initialization
-    @classmethod
-    def setUpClass(cls):
-        if sys.flags.debug:
-            print('> setUpClass method is called.')
-        cls.CLS_VAL = '> setUpClass : initialized!'
-        if sys.flags.debug:
-            print(cls.CLS_VAL)
-
-    # called when test class end
-    @classmethod
-    def tearDownClass(cls):
-        if sys.flags.debug:
-            print('> tearDownClass method is called.')
-        cls.CLS_VAL = '> tearDownClass : released!'
-        if sys.flags.debug:
-            print(cls.CLS_VAL)
-
-    # called when a test method runs
-    def setUp(self):
-        if sys.flags.debug:
-            print(os.linesep + '> setUp method is called.')
-        self.smpl = ssGSEA()
-
-    # called when a test method ends
-    def tearDown(self):
-        if sys.flags.debug:
-            print(os.linesep + '> tearDown method is called.')
-
-    def _df_checker(self,df):
-        if type(df)!=pd.core.frame.DataFrame:
-            return False
-        elif df.shape[0]==0:
-            return False
-        else:
-            head = df.head(1)
-            judge = math.isnan(head.iat[0,0])
-            return not judge
-
-    def _sr_checker(self,sr):
-        if type(sr)!=pd.core.series.Series:
-            return False
-        if sr.shape[0]==0:
-            return False
-        else:
-            head = sr.head(1)
-            judge = math.isnan(head.iat[0])
-            return not judge
-
-    def test_calc1(self):
-        # prepare test patterns
-        test_patterns = [
-            ("standard",0.25), # (arg1, arg2, ..., expected result)
-            ("kuiper",0.25), # (arg1, arg2, ..., expected result)
-            ("gsva",0.25), # (arg1, arg2, ..., expected result)
-            ("standard",0.5) # (arg1, arg2, ..., expected result)
-            ]
-
-        ref,obj = self.smpl.generate_test_data()
-        self.smpl.fit(ref)
-        fterm = list(ref.keys())[0]
-
-        ### loop for sweeping all conditions
-        for tmethod,ta in test_patterns:
-            with self.subTest(method=tmethod,alpha=ta,fterm=fterm):
-                self.assertTrue(self._df_checker(self.smpl.calc(data=obj,
-                                                 method=tmethod,alpha=ta,fterm=fterm)))
-
-    def test_calc2(self):
-        # prepare test patterns
-        test_patterns = [
-            ("standard",0.25), # (arg1, arg2, ..., expected result)
-            ("kuiper",0.25), # (arg1, arg2, ..., expected result)
-            ("gsva",0.25), # (arg1, arg2, ..., expected result)
-            ("standard",0.5) # (arg1, arg2, ..., expected result)
-            ]
-
-        ref,obj = self.smpl.generate_test_data()
-        self.smpl.fit(ref)
-
-        ### loop for sweeping all conditions
-        for tmethod,ta in test_patterns:
-            with self.subTest(method=tmethod,alpha=ta,fterm=None):
-                self.assertTrue(self._df_checker(self.smpl.calc(data=obj,
-                                                 method=tmethod,alpha=ta,fterm=None)))
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Sep 23 13:05:34 2019
+
+@author: tadahaya
+"""
+import unittest
+import pandas as pd
+import numpy as np
+import os
+import sys
+import math
+import tempfile
+from scipy.stats import norm
+
+from enan.ssgsea import ssGSEA
+from enan.calculator._gsea import Calculator
+
+class SampleTest(unittest.TestCase):
+    CLS_VAL = 'none'
+
+    # called when test class initialization
+    @classmethod
+    def setUpClass(cls):
+        if sys.flags.debug:
+            print('> setUpClass method is called.')
+        cls.CLS_VAL = '> setUpClass : initialized!'
+        if sys.flags.debug:
+            print(cls.CLS_VAL)
+
+    # called when test class end
+    @classmethod
+    def tearDownClass(cls):
+        if sys.flags.debug:
+            print('> tearDownClass method is called.')
+        cls.CLS_VAL = '> tearDownClass : released!'
+        if sys.flags.debug:
+            print(cls.CLS_VAL)
+
+    # called when a test method runs
+    def setUp(self):
+        if sys.flags.debug:
+            print(os.linesep + '> setUp method is called.')
+        self.smpl = ssGSEA()
+
+    # called when a test method ends
+    def tearDown(self):
+        if sys.flags.debug:
+            print(os.linesep + '> tearDown method is called.')
+
+    def _df_checker(self,df):
+        if type(df)!=pd.core.frame.DataFrame:
+            return False
+        elif df.shape[0]==0:
+            return False
+        else:
+            head = df.head(1)
+            judge = math.isnan(head.iat[0,0])
+            return not judge
+
+    def _sr_checker(self,sr):
+        if type(sr)!=pd.core.series.Series:
+            return False
+        if sr.shape[0]==0:
+            return False
+        else:
+            head = sr.head(1)
+            judge = math.isnan(head.iat[0])
+            return not judge
+
+    def test_calc1(self):
+        # prepare test patterns
+        test_patterns = [
+            ("standard",0.25), # (arg1, arg2, ..., expected result)
+            ("kuiper",0.25), # (arg1, arg2, ..., expected result)
+            ("gsva",0.25), # (arg1, arg2, ..., expected result)
+            ("standard",0.5) # (arg1, arg2, ..., expected result)
+            ]
+
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        fterm = list(ref.keys())[0]
+
+        ### loop for sweeping all conditions
+        for tmethod,ta in test_patterns:
+            with self.subTest(method=tmethod,alpha=ta,fterm=fterm):
+                self.assertTrue(self._df_checker(self.smpl.calc(data=obj,
+                                                 method=tmethod,alpha=ta,fterm=fterm)))
+
+    def test_calc2(self):
+        # prepare test patterns
+        test_patterns = [
+            ("standard",0.25), # (arg1, arg2, ..., expected result)
+            ("kuiper",0.25), # (arg1, arg2, ..., expected result)
+            ("gsva",0.25), # (arg1, arg2, ..., expected result)
+            ("standard",0.5) # (arg1, arg2, ..., expected result)
+            ]
+
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+
+        ### loop for sweeping all conditions
+        for tmethod,ta in test_patterns:
+            with self.subTest(method=tmethod,alpha=ta,fterm=None):
+                self.assertTrue(self._df_checker(self.smpl.calc(data=obj,
+                                                 method=tmethod,alpha=ta,fterm=None)))
+
+    def test_n_jobs(self):
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        res = self.smpl.calc(data=obj,alpha=0.25)
+        res2 = self.smpl.calc(data=obj,alpha=0.25,n_jobs=2)
+        self.assertTrue(np.allclose(res.values,res2.loc[res.index,res.columns].values))
+
+    def test_dtype(self):
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        fterm = list(ref.keys())[0]
+        for v in [None,fterm]:
+            with self.subTest(fterm=v):
+                res = self.smpl.calc(data=obj,fterm=v)
+                res2 = self.smpl.calc(data=obj,fterm=v,dtype=np.float32)
+                self.assertTrue(np.allclose(res.values,res2.loc[res.index].values,atol=1e-4))
+
+    def test_dtype_tolerance(self):
+        # the tolerance of float32 stated in _check_dtype at a realistic feature No.
+        rng = np.random.default_rng(0)
+        n = 20000
+        obj = pd.DataFrame(rng.normal(size=(n,3)),columns=["xxxx","yyyy","zzzz"])
+        ref = {"t{}".format(i):set(rng.choice(n,int(rng.integers(10,500)),replace=False).tolist()) for i in range(50)}
+        self.smpl.fit(ref)
+        for method in ["standard","kuiper","gsva"]:
+            for alpha in [0,0.25,1.0]:
+                with self.subTest(method=method,alpha=alpha):
+                    res = self.smpl.calc(data=obj,method=method,alpha=alpha)
+                    res2 = self.smpl.calc(data=obj,method=method,alpha=alpha,dtype=np.float32)
+                    err = np.abs(res.values - res2.loc[res.index,res.columns].values)
+                    self.assertTrue(np.all(err <= 2/n))
+
+    def test_focused(self):
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        whole = self.smpl.calc(data=obj,fterm=None)
+        for fterm in list(ref.keys())[:3]:
+            with self.subTest(fterm=fterm):
+                res = self.smpl.calc(data=obj,fterm=fterm)
+                self.assertTrue(np.allclose(res.values[:,0],whole.loc[fterm,res.index].values))
+
+    def test_repeated_label(self):
+        # a repeated label is a hit at each row, the same as distinct labels in the set
+        ref,obj = self.smpl.generate_test_data()
+        dup = pd.concat([obj,obj.iloc[:5]])
+        renamed = dup.copy()
+        renamed.index = list(obj.index) + [10000 + i for i in obj.index[:5]]
+        extended = {k:v | {10000 + i for i in v if i < 5} for k,v in ref.items()}
+        for method in ["standard","kuiper","gsva"]:
+            with self.subTest(method=method):
+                self.smpl.fit(ref)
+                res = self.smpl.calc(data=dup,method=method)
+                self.smpl.fit(extended)
+                expected = self.smpl.calc(data=renamed,method=method)
+                self.assertTrue(np.allclose(res.loc[expected.index],expected))
+
+    def test_calc_matrix(self):
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        res = self.smpl.calc(data=obj,method="gsva",alpha=0.25)
+        calc = Calculator()
+        calc.to_expssgsea()
+        calc.to_gsva()
+        for v in obj.columns:
+            with self.subTest(sample=v):
+                full = calc.calc(obj=obj[v],ref=ref,alpha=0.25,curve=True)
+                self.assertTrue(np.allclose(full["ES"],res.loc[full.index,v],equal_nan=True))
+
+    def test_update(self):
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        whole = self.smpl.calc(data=obj,method="kuiper")
+        col = list(obj.columns)
+        with tempfile.TemporaryDirectory() as temp:
+            path = os.path.join(temp,"res.pkl")
+            self.smpl.calc(data=obj[col[:2]],method="kuiper")
+            self.smpl.update(obj[col[2:4]],path=path)
+            smpl = ssGSEA()
+            smpl.fit(ref)
+            res = smpl.update(obj[col[4:]],path=path)
+            self.assertEqual(list(res.columns),list(obj.columns))
+            self.assertTrue(np.allclose(whole.values,res.loc[whole.index].values,equal_nan=True))
+            self.assertTrue(np.allclose(res.values,pd.read_pickle(path).values,equal_nan=True))
+            with self.assertRaises(ValueError):
+                smpl.update(obj[col[4:]],path=path)
+            smpl.fit({k:v for k,v in list(ref.items())[1:]})
+            with self.assertRaises(ValueError):
+                smpl.update(obj[col[4:]].add_suffix("_new"),path=path)
+        # the normalization fused into the stored result is applied to the new samples
+        whole = self.smpl.calc(data=obj,normalize=True)
+        self.smpl.calc(data=obj[col[:3]],normalize=True)
+        res = self.smpl.update(obj[col[3:]])
+        self.assertTrue(res.attrs["normalize"])
+        self.assertTrue(np.allclose(whole.values,res.loc[whole.index].values,equal_nan=True))
+
+    def test_calc_stream(self):
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        res = self.smpl.calc(data=obj)
+        with tempfile.TemporaryDirectory() as temp:
+            path = os.path.join(temp,"obj.npy")
+            out = os.path.join(temp,"res.npy")
+            np.save(path,obj.values)
+            res2 = self.smpl.calc_stream(path,out=out,index=obj.index,columns=obj.columns,block=2)
+            self.assertTrue(np.allclose(res.values,res2.loc[res.index,res.columns].values,equal_nan=True))
+            self.assertTrue(np.allclose(np.load(out),res2.values,equal_nan=True))
+            with self.assertRaises(ValueError):
+                self.smpl.calc_stream(path)
+            del res2
+
+    def test_calc_stream_parquet(self):
+        try:
+            import pyarrow
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        res = self.smpl.calc(data=obj)
+        with tempfile.TemporaryDirectory() as temp:
+            path = os.path.join(temp,"obj.parquet")
+            obj.to_parquet(path)
+            res2 = self.smpl.calc_stream(path,block=2)
+            self.assertTrue(np.allclose(res.values,res2.loc[res.index,res.columns].values,equal_nan=True))
+
+    def test_calc_stream_hdf5(self):
+        try:
+            import h5py
+        except ImportError:
+            self.skipTest("h5py is not installed")
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        res = self.smpl.calc(data=obj)
+        with tempfile.TemporaryDirectory() as temp:
+            path = os.path.join(temp,"obj.h5")
+            with h5py.File(path,"w") as f:
+                f.create_dataset("obj",data=obj.values)
+            res2 = self.smpl.calc_stream(path,index=obj.index,columns=obj.columns,key="obj",block=2)
+            self.assertTrue(np.allclose(res.values,res2.loc[res.index,res.columns].values,equal_nan=True))
+            # the file is closed after streaming, so that it can be truncated
+            with h5py.File(path,"w") as f:
+                pass
+
+    def test_focused_list(self):
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        fterm = list(ref.keys())[:3]
+        res = self.smpl.calc(data=obj,fterm=fterm)
+        self.assertEqual(list(res.index),fterm)
+        for v in fterm:
+            with self.subTest(fterm=v):
+                each = self.smpl.calc(data=obj,fterm=v)
+                self.assertTrue(np.allclose(each["ES"],res.loc[v,each.index]))
+
+    def test_gsva_kcdf(self):
+        ref,obj = self.smpl.generate_test_data()
+        obj = obj.iloc[:200] # the test sets consist of 0-50
+        self.smpl.fit(ref)
+        res = self.smpl.calc(data=obj,method="gsva_kcdf",alpha=1.0,bins=None)
+        # naive GSVA: pairwise kernel CDF, rank scores and the max difference
+        X = obj.values
+        h = np.std(X,axis=1,ddof=1)[:,None,None]/4
+        F = np.mean(norm.cdf((X[:,:,None] - X[:,None,:])/h),axis=2)
+        Z = np.log(F/(1 - F))
+        n = X.shape[0]
+        for j,v in enumerate(obj.columns):
+            order = np.argsort(-Z[:,j],kind="stable") # ties are broken in the order of features
+            weight = np.abs(n/2 - np.arange(n))
+            for k,m in ref.items():
+                loc = obj.index[order].isin(list(m))
+                walk = np.cumsum(weight*loc)/np.sum(weight*loc) - np.cumsum(~loc)/np.sum(~loc)
+                with self.subTest(sample=v,term=k):
+                    self.assertAlmostEqual(res.loc[k,v],max(walk.max(),0) + min(walk.min(),0))
+        binned = self.smpl.calc(data=obj,method="gsva_kcdf",alpha=1.0)
+        self.assertTrue(np.allclose(binned.loc[res.index],res,atol=0.05))
+        focused = self.smpl.calc(data=obj,fterm=k,method="gsva_kcdf",alpha=1.0,bins=None)
+        self.assertTrue(np.allclose(focused["ES"],res.loc[k,focused.index]))
+        with self.assertRaises(ValueError):
+            self.smpl.calc_stream(obj,method="gsva_kcdf")
+
+    def test_sketch(self):
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        for method in ["standard","kuiper","gsva"]:
+            exact = self.smpl.calc(data=obj,method=method)
+            for threshold in [None,0.3]:
+                with self.subTest(method=method,threshold=threshold):
+                    res = self.smpl.calc(data=obj,method=method,sketch=16,threshold=threshold)
+                    bound = self.smpl.get_bound()
+                    err = (res - exact.loc[res.index]).abs()
+                    self.assertTrue(np.all(err.values <= bound.values + 1e-6))
+                    if threshold is not None:
+                        passed = exact.loc[res.index].values >= threshold
+                        self.assertTrue(np.allclose(res.values[passed],exact.loc[res.index].values[passed]))
+                    self.assertEqual(res.attrs["sketch"],16)
+                    with self.assertRaises(ValueError):
+                        self.smpl.update(obj.add_suffix("_new"))
+
+    def test_checkpoint(self):
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        whole = self.smpl.calc(data=obj)
+        with tempfile.TemporaryDirectory() as temp:
+            path = os.path.join(temp,"checkpoint")
+            res = self.smpl.calc(data=obj,checkpoint=path,block=4)
+            self.assertTrue(np.allclose(res,whole.loc[res.index]))
+            files = sorted(v for v in os.listdir(path) if v.endswith(".npy"))
+            self.assertEqual(len(files),3)
+            # a preempted run: the lost block is scored, the saved ones are loaded
+            os.remove(os.path.join(path,files[-1]))
+            np.save(os.path.join(path,files[0]),np.zeros((len(ref),4)))
+            res = self.smpl.calc(data=obj,checkpoint=path,block=4)
+            self.assertTrue(np.all(res[obj.columns[:4]]==0))
+            self.assertTrue(np.allclose(res[obj.columns[4:]],whole.loc[res.index,obj.columns[4:]]))
+            with self.assertRaises(ValueError):
+                self.smpl.calc(data=obj,checkpoint=path,block=4,alpha=0.5)
+            # the same labels with recomputed values are not resumed
+            with self.assertRaises(ValueError):
+                self.smpl.calc(data=obj.iloc[::-1].set_axis(obj.index),checkpoint=path,block=4)
+
+    def test_normalize(self):
+        ref,obj = self.smpl.generate_test_data()
+        self.smpl.fit(ref)
+        res = self.smpl.calc(data=obj)
+        norm = self.smpl.normalize_score()
+        kmax = np.array([1 - len(ref[v])/obj.shape[0] for v in res.index])
+        self.assertTrue(np.allclose(norm.values,res.values/kmax[:,None]))
+        fused = self.smpl.calc(data=obj,normalize=True)
+        self.assertTrue(np.allclose(fused.loc[norm.index],norm))